@@ -1,13 +1,24 @@
 import json
 import os
+import signal
 import sys
 import time
 import socket
 import requests
 from datetime import datetime
+from tailer import FileTailer
+from spool import Spool
+from sender import BatchSender
+from reducer import LogReducer
 
 CONFIG_PATH = os.path.join(os.path.dirname(__file__), 'config.json')
 CREDS_PATH = os.path.join(os.path.dirname(__file__), '.agent_creds')
+OFFSETS_PATH = os.path.join(os.path.dirname(__file__), '.agent_offsets')
+SPOOL_PATH = os.path.join(os.path.dirname(__file__), 'spool')
+
+# Retry delay bounds (seconds) while the backend is unreachable
+MIN_BACKOFF = 1
+MAX_BACKOFF = 60
 
 class LogAgent:
     def __init__(self):
@@ -15,7 +26,42 @@ class LogAgent:
         self.backend_url = self.config.get('backend_url', 'http://localhost:5000')
         self.agent_id, self.api_key = self.get_or_create_credentials()
         self.hostname = socket.gethostname()
-        self.file_positions = {}
+        self.tailer = FileTailer(OFFSETS_PATH)
+        
+        reduction = self.config.get('reduction', {})
+        self.reducer = LogReducer(
+            window=reduction.get('window', 10),
+            collapse_numbers=reduction.get('collapse_numbers', True),
+            max_groups=reduction.get('max_groups', 10000),
+            rate_limits={
+                source['type']: source['rate_limit']
+                for source in self.config.get('log_sources', []) if source.get('rate_limit')
+            },
+            sample_rate=reduction.get('sample_rate', 0.01),
+            max_dropped=reduction.get('max_dropped', 1000)
+        ) if reduction.get('enabled', True) else None
+        if self.reducer:
+            # Repeats still held when the agent last stopped
+            self.reducer.restore(self.tailer.state)
+        self.stopping = False
+        
+        spool_config = self.config.get('spool', {})
+        self.spool = Spool(
+            spool_config.get('path', SPOOL_PATH),
+            segment_bytes=spool_config.get('segment_bytes', 8 * 1024 * 1024),
+            max_bytes=spool_config.get('max_bytes', 256 * 1024 * 1024)
+        )
+        # Batches spooled after the last saved checkpoint were never sent and
+        # will be read again from the saved offsets
+        self.spool.discard_after(self.tailer.seq)
+        self.backoff = 0
+        self.next_attempt = 0
+        
+        self.sender = BatchSender(
+            self.backend_url, self.agent_id, self.api_key, self.hostname,
+            max_workers=self.config.get('max_concurrent_uploads', 4)
+        )
+        self.sender.negotiate()
     
     def load_config(self):
         with open(CONFIG_PATH, 'r') as f:
@@ -76,25 +122,17 @@ class LogAgent:
         log_type = source['type']
         
         # For demo purposes, generate sample logs if file doesn't exist
-        if not os.path.exists(log_path):
+        if not self.tailer.is_tracking(log_path):
             return self.generate_sample_logs(log_type)
         
         try:
-            current_pos = self.file_positions.get(log_path, 0)
-            
-            with open(log_path, 'r', errors='ignore') as f:
-                f.seek(current_pos)
-                for line in f:
-                    line = line.strip()
-                    if line:
-                        severity = self.determine_severity(line)
-                        logs.append({
-                            'type': log_type,
-                            'message': line,
-                            'severity': severity
-                        })
-                
-                self.file_positions[log_path] = f.tell()
+            for line in self.tailer.read_lines(log_path):
+                severity = self.determine_severity(line)
+                logs.append({
+                    'type': log_type,
+                    'message': line,
+                    'severity': severity
+                })
         except Exception as e:
             print(f"[!] Error reading {log_path}: {e}")
         
@@ -129,7 +167,8 @@ class LogAgent:
         
         return logs[:1]  # Return one sample per cycle
     
-    def determine_severity(self, message):
+    @staticmethod
+    def determine_severity(message):
         """Determine log severity"""
         msg_lower = message.lower()
         
@@ -142,59 +181,98 @@ class LogAgent:
         else:
             return 'info'
     
-    def send_logs(self, logs):
-        """Send logs to backend API"""
-        if not logs:
-            return True
+    def spool_logs(self, logs):
+        """Durably queue logs, one lane of batches per source; True if anything was queued"""
+        by_source = {}
+        for log in logs:
+            by_source.setdefault(log['type'], []).append(log)
         
-        try:
-            headers = {
-                'X-Agent-ID': self.agent_id,
-                'X-API-Key': self.api_key,
-                'Content-Type': 'application/json'
-            }
+        for source, source_logs in by_source.items():
+            self.spool.append(
+                source_logs,
+                source=source,
+                max_logs=self.config.get('batch_max_logs', 1000),
+                max_bytes=self.config.get('batch_max_bytes', 1024 * 1024),
+                # Committed by the next checkpoint
+                seq=self.tailer.seq + 1
+            )
+        return bool(by_source)
+    
+    def flush_spool(self):
+        """Replay spooled batches oldest first, backing off while the backend is down"""
+        if time.monotonic() < self.next_attempt:
+            return
+        
+        window = self.sender.max_workers * 4
+        while True:
+            entries = self.spool.peek(window)
+            if not entries:
+                return
             
-            payload = {
-                'hostname': self.hostname,
-                'logs': logs
-            }
+            results = self.sender.send_batches([record for record, _ in entries])
             
-            response = requests.post(
-                f'{self.backend_url}/api/logs/send',
-                json=payload,
-                headers=headers,
-                timeout=10
-            )
+            # The cursor only moves past the contiguous prefix of delivered batches;
+            # anything sent after a failure is deduplicated by batch id on replay
+            delivered = 0
+            while delivered < len(results) and results[delivered]:
+                delivered += 1
+            if delivered:
+                self.spool.ack(entries[delivered - 1][1])
             
-            if response.status_code == 200:
-                print(f"[+] Sent {len(logs)} logs")
-                return True
-            else:
-                print(f"[!] Error sending logs: {response.status_code} - {response.text}")
-                return False
-        except Exception as e:
-            print(f"[!] Error sending logs: {e}")
-            return False
+            if delivered < len(results):
+                self.backoff = min(max(self.backoff * 2, MIN_BACKOFF), MAX_BACKOFF)
+                self.next_attempt = time.monotonic() + self.backoff
+                print(f"[*] Backend unavailable, retrying spooled batches in {self.backoff}s")
+                return
+            
+            self.backoff = 0
+    
+    def checkpoint(self, spooled=False):
+        """Save offsets together with the repeat counts held for those lines"""
+        # Offsets only move once the lines are safely in the spool, and spooled
+        # batches are only sent once this checkpoint commits them
+        self.tailer.save_offsets(state=self.reducer.snapshot() if self.reducer else None, force=spooled)
+    
+    def stop(self, signum=None, frame=None):
+        self.stopping = True
+    
+    def shutdown(self):
+        if self.reducer:
+            # Send the counts of repeats still held in open windows
+            spooled = self.spool_logs(self.reducer.flush(force=True))
+        self.checkpoint(spooled)
+        # Best effort; whatever is not delivered stays spooled for the next start
+        self.flush_spool()
+        self.tailer.close()
+        self.spool.close()
+        self.sender.close()
+        print("\n[*] Agent stopped")
     
     def run(self):
         """Main agent loop"""
         print(f"[*] Log Agent started - ID: {self.agent_id}")
         print(f"[*] Hostname: {self.hostname}")
         print(f"[*] Backend: {self.backend_url}")
+        signal.signal(signal.SIGTERM, self.stop)
         
-        while True:
+        while not self.stopping:
             try:
                 logs = self.collect_logs()
-                if logs:
-                    self.send_logs(logs)
+                if self.reducer:
+                    logs = self.reducer.process(logs)
+                spooled = self.spool_logs(logs)
+                self.checkpoint(spooled)
+                self.flush_spool()
                 
-                time.sleep(self.config.get('collection_interval', 5))
+                # Wakes early on inotify events, otherwise acts as the poll interval
+                self.tailer.wait(self.config.get('collection_interval', 5))
             except KeyboardInterrupt:
-                print("\n[*] Agent stopped")
                 break
             except Exception as e:
                 print(f"[!] Error in agent loop: {e}")
                 time.sleep(5)
+        
+        self.shutdown()
 
 if __name__ == '__main__':
     agent = LogAgent()
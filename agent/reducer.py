@@ -0,0 +1,185 @@
+import random
+import re
+import time
+
+# Numbers folded by collapse_numbers. Addresses and names with digits in them
+# (10.0.0.5, fe80::1, web01, user2) are entities, so they stay part of the key.
+_NUMBERS = re.compile(
+    r'(?P<keep>(?<![\d.])(?:\d{1,3}\.){3}\d{1,3}(?![\d.])'
+    r'|(?<![\w:])(?:[0-9A-Fa-f]{1,4}:){7}[0-9A-Fa-f]{1,4}(?![\w:])'
+    r'|(?<![\w:])(?:[0-9A-Fa-f]{1,4}:)*:(?::?[0-9A-Fa-f]{1,4})*(?![\w:])'
+    r'|(?<!\w)[A-Za-z][\w\-]*?\d[\w\-]*)'
+    r'|\d+'
+)
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class RepeatGroup:
+    __slots__ = ('log', 'expires', 'count', 'first_seen', 'last_seen')
+
+    def __init__(self, log, expires):
+        self.log = log
+        self.expires = expires
+        self.count = 0
+        self.first_seen = None
+        self.last_seen = None
+
+    def add(self, log, timestamp):
+        if self.count == 0:
+            self.log = log
+            self.first_seen = timestamp
+        self.count += 1
+        self.last_seen = timestamp
+
+
+class LogReducer:
+    """Collapses repeated lines and rate-limits noisy sources at the edge.
+
+    The first line of a kind is passed through immediately; repeats of it
+    (optionally ignoring numbers other than addresses and names) within the
+    window are held back and sent as one record with a count and first/last
+    seen times when the window closes. Per-source token buckets cap how many
+    new kinds of line are passed through. Lines over the limit are sampled;
+    the rest are only counted, per kind up to max_dropped kinds and per
+    source beyond that. A per-kind tally is sent as the first line it
+    counted plus a count, so the detector still sees the text and the total;
+    a per-source tally mixes unrelated lines, so it is sent as a plain notice
+    that names no host, address or user.
+    """
+
+    def __init__(self, window=10, collapse_numbers=True, max_groups=10000, rate_limits=None,
+                 sample_rate=0.01, max_dropped=1000, seed=None):
+        self.window = window
+        self.collapse_numbers = collapse_numbers
+        self.max_groups = max_groups
+        self.sample_rate = sample_rate
+        self.max_dropped = max_dropped
+        self.random = random.Random(seed)
+        self.buckets = {
+            source: TokenBucket(limit['rate'], limit.get('burst', limit['rate']))
+            for source, limit in (rate_limits or {}).items()
+        }
+        self.groups = {}
+        self.dropped = {}
+        self.overflow = {}
+
+    def key(self, log):
+        message = log.get('message', '')
+        if self.collapse_numbers:
+            message = _NUMBERS.sub(lambda match: match.group('keep') or '#', message)
+        return log.get('type'), log.get('severity'), message
+
+    def process(self, logs):
+        """Reduce a batch of collected logs and return what should be sent"""
+        now = time.monotonic()
+        timestamp = time.time()
+        out = []
+
+        for log in logs:
+            key = self.key(log)
+            group = self.groups.get(key)
+            if group is not None:
+                group.add(log, timestamp)
+                continue
+
+            source = log.get('type')
+            bucket = self.buckets.get(source)
+            if bucket is None or bucket.take(now):
+                if len(self.groups) < self.max_groups:
+                    self.groups[key] = RepeatGroup(log, now + self.window)
+                out.append(log)
+            elif self.random.random() < self.sample_rate:
+                out.append(log)
+            else:
+                self.drop(key, log, now, timestamp)
+
+        out.extend(self.flush(now))
+        return out
+
+    def drop(self, key, log, now, timestamp):
+        """Count an over-limit line without sending it"""
+        group = self.dropped.get(key)
+        if group is None and len(self.dropped) < self.max_dropped:
+            group = self.dropped[key] = RepeatGroup(log, now + self.window)
+        if group is not None:
+            group.add(log, timestamp)
+            return
+
+        # Too many kinds to track: only count them per source, keeping none of their text
+        source = log.get('type')
+        group = self.overflow.get(source)
+        if group is None:
+            group = self.overflow[source] = RepeatGroup(None, now + self.window)
+        group.add(None, timestamp)
+
+    def flush(self, now=None, force=False):
+        """Emit summaries for groups whose window has closed"""
+        now = time.monotonic() if now is None else now
+        out = []
+
+        for groups in (self.groups, self.dropped, self.overflow):
+            for key, group in list(groups.items()):
+                if not force and group.expires > now:
+                    continue
+                del groups[key]
+                if not group.count:
+                    continue
+                out.append(self.overflow_summary(key, group) if groups is self.overflow else self.summary(group))
+
+        return out
+
+    def summary(self, group):
+        summary = dict(group.log)
+        summary.update({
+            'count': group.count,
+            'first_seen': group.first_seen,
+            'last_seen': group.last_seen
+        })
+        return summary
+
+    def overflow_summary(self, source, group):
+        return {
+            'type': source,
+            'severity': 'warning',
+            'message': f'Rate limit exceeded, {source} lines dropped without a summary',
+            'count': group.count,
+            'first_seen': group.first_seen,
+            'last_seen': group.last_seen
+        }
+
+    def snapshot(self, now=None):
+        """Held groups as JSON-safe data, so a restart does not lose their counts"""
+        now = time.monotonic() if now is None else now
+        state = {}
+        for name in ('groups', 'dropped', 'overflow'):
+            state[name] = [
+                [key if name == 'overflow' else list(key), group.log, max(0.0, group.expires - now),
+                 group.count, group.first_seen, group.last_seen]
+                for key, group in getattr(self, name).items()
+            ]
+        return state
+
+    def restore(self, state, now=None):
+        """Reload groups saved by snapshot(), resuming their windows"""
+        now = time.monotonic() if now is None else now
+        for name in ('groups', 'dropped', 'overflow'):
+            groups = getattr(self, name)
+            for key, log, remaining, count, first_seen, last_seen in (state or {}).get(name, []):
+                group = RepeatGroup(log, now + remaining)
+                group.count, group.first_seen, group.last_seen = count, first_seen, last_seen
+                groups[key if name == 'overflow' else tuple(key)] = group
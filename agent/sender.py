@@ -0,0 +1,155 @@
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'shared'))
+import codec
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_BYTES = 512
+# Seconds to stay on a fallback format/encoding before negotiating again
+RENEGOTIATE_AFTER = 300
+
+
+class BatchSender:
+    """Uploads log batches over a pooled keep-alive HTTP session.
+
+    Batches are grouped into one lane per log source. Lanes upload in
+    parallel on up to max_workers connections while the batches inside a
+    lane go out one at a time, so each source's logs stay in order.
+    """
+
+    def __init__(self, backend_url, agent_id, api_key, hostname, max_workers=4):
+        self.backend_url = backend_url
+        self.hostname = hostname
+        self.max_workers = max_workers
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({'X-Agent-ID': agent_id, 'X-API-Key': api_key})
+
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.content_type = codec.JSON_TYPE
+        self.content_encoding = 'identity'
+        self.renegotiate_at = None
+        self.lock = threading.Lock()
+
+    def negotiate(self):
+        """Pick the best payload format and compression the backend accepts"""
+        try:
+            response = self.session.get(f'{self.backend_url}/api/logs/capabilities', timeout=5)
+            if response.status_code == 200:
+                caps = response.json()
+                self.content_type = codec.negotiate(caps.get('formats', []), codec.supported_formats()) or self.content_type
+                self.content_encoding = codec.negotiate(caps.get('encodings', []), codec.supported_encodings()) or self.content_encoding
+        except Exception as e:
+            print(f"[!] Could not negotiate encoding, using plain JSON: {e}")
+
+        print(f"[*] Payload format: {self.content_type} ({self.content_encoding})")
+
+    def fall_back(self, rejected, content_type, content_encoding):
+        """Stop using what the backend could not read, until the next negotiation"""
+        with self.lock:
+            # Backends that do not say which part they rejected get both dropped
+            if rejected in ('format', None) and self.content_type == content_type:
+                self.content_type = codec.JSON_TYPE
+            if rejected in ('encoding', None) and self.content_encoding == content_encoding:
+                self.content_encoding = 'identity'
+            self.renegotiate_at = time.monotonic() + RENEGOTIATE_AFTER
+        print(f"[!] Backend could not read {content_type} ({content_encoding}), "
+              f"using {self.content_type} ({self.content_encoding}) for {RENEGOTIATE_AFTER}s")
+
+    def renegotiate(self):
+        """Try the preferred format again once a fallback has run its course"""
+        with self.lock:
+            if self.renegotiate_at is None or time.monotonic() < self.renegotiate_at:
+                return
+            self.renegotiate_at = None
+            self.negotiate()
+
+    def send(self, logs, batch_id=None):
+        """Send one batch, returning True once the backend has it"""
+        if not logs:
+            return True
+
+        self.renegotiate()
+        try:
+            content_type, content_encoding = self.content_type, self.content_encoding
+            headers = {'Content-Type': content_type}
+            if batch_id:
+                headers['X-Batch-ID'] = batch_id
+
+            body = codec.encode_payload({'hostname': self.hostname, 'logs': logs}, content_type)
+            if content_encoding != 'identity' and len(body) >= MIN_COMPRESS_BYTES:
+                body = codec.compress(body, content_encoding)
+                headers['Content-Encoding'] = content_encoding
+
+            response = self.session.post(
+                f'{self.backend_url}/api/logs/send',
+                data=body,
+                headers=headers,
+                timeout=10
+            )
+
+            if response.status_code == 200:
+                print(f"[+] Sent {len(logs)} logs")
+                return True
+
+            try:
+                rejected = response.json().get('rejected')
+            except ValueError:
+                rejected = None
+            sent_encoding = headers.get('Content-Encoding', 'identity')
+            unreadable = ((rejected == 'format' and content_type != codec.JSON_TYPE) or
+                          (rejected == 'encoding' and sent_encoding != 'identity'))
+
+            if response.status_code == 415 or (response.status_code == 400 and unreadable):
+                # Retry the batch without whatever the backend could not read
+                self.fall_back(rejected, content_type, sent_encoding)
+                return False
+            elif response.status_code == 400:
+                # Malformed batch: retrying cannot succeed and would block the spool
+                print(f"[!] Backend rejected batch, dropping it: {response.text}")
+                return True
+            else:
+                print(f"[!] Error sending logs: {response.status_code} - {response.text}")
+                return False
+        except Exception as e:
+            print(f"[!] Error sending logs: {e}")
+            return False
+
+    def send_lane(self, records):
+        """Send a source's batches in order, stopping at the first failure"""
+        sent = 0
+        for record in records:
+            if not self.send(record['logs'], batch_id=record['id']):
+                break
+            sent += 1
+        return sent
+
+    def send_batches(self, records):
+        """Upload records concurrently per source; returns a success flag per record"""
+        lanes = {}
+        for index, record in enumerate(records):
+            lanes.setdefault(record.get('source'), []).append(index)
+
+        futures = {
+            source: self.executor.submit(self.send_lane, [records[i] for i in indexes])
+            for source, indexes in lanes.items()
+        }
+
+        results = [False] * len(records)
+        for source, future in futures.items():
+            for index in lanes[source][:future.result()]:
+                results[index] = True
+        return results
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.session.close()
@@ -0,0 +1,213 @@
+import json
+import os
+import struct
+import uuid
+import zlib
+
+# Record header: payload length and CRC32 of the payload
+_RECORD_HEADER = struct.Struct('>II')
+_SEGMENT_SUFFIX = '.seg'
+_CURSOR_FILE = 'cursor.json'
+
+
+def split_batches(logs, max_logs, max_bytes):
+    """Split logs into batches capped by record count and approximate size"""
+    batch, size = [], 0
+    for log in logs:
+        log_size = len(log.get('message', '')) + 64
+        if batch and (len(batch) >= max_logs or size + log_size > max_bytes):
+            yield batch
+            batch, size = [], 0
+        batch.append(log)
+        size += log_size
+    if batch:
+        yield batch
+
+
+class Spool:
+    """Append-only on-disk queue of log batches awaiting delivery.
+
+    Batches are written to numbered segment files as CRC-checked records,
+    each with a stable id the backend uses to drop replays it has already
+    stored. A cursor file records the first unacknowledged record. When the
+    spool grows past max_bytes the oldest segments are evicted.
+
+    Records can carry the seq of the reader checkpoint that will cover them;
+    discard_after() drops those whose checkpoint was never saved, so lines
+    read again after a crash are not queued twice under new ids.
+    """
+
+    def __init__(self, directory, segment_bytes=8 * 1024 * 1024, max_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+        self.segments = sorted(
+            int(name[:-len(_SEGMENT_SUFFIX)])
+            for name in os.listdir(directory) if name.endswith(_SEGMENT_SUFFIX)
+        )
+        self.cursor = self.load_cursor()
+        self.writer = None
+        self.recover()
+
+    def segment_path(self, segment):
+        return os.path.join(self.directory, f'{segment:012d}{_SEGMENT_SUFFIX}')
+
+    def load_cursor(self):
+        path = os.path.join(self.directory, _CURSOR_FILE)
+        if os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    cursor = json.load(f)
+                return cursor['segment'], cursor['offset']
+            except (OSError, ValueError, KeyError) as e:
+                print(f"[!] Ignoring unreadable spool cursor: {e}")
+        return (self.segments[0] if self.segments else 0), 0
+
+    def save_cursor(self):
+        path = os.path.join(self.directory, _CURSOR_FILE)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'segment': self.cursor[0], 'offset': self.cursor[1]}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def recover(self):
+        """Cut a torn record left at the end of the newest segment by a crash"""
+        if not self.segments:
+            return
+
+        path = self.segment_path(self.segments[-1])
+        valid = 0
+        with open(path, 'rb') as f:
+            while self.read_record(f) is not None:
+                valid = f.tell()
+        if valid < os.path.getsize(path):
+            print(f"[!] Truncating damaged spool tail in {path}")
+            with open(path, 'r+b') as f:
+                f.truncate(valid)
+
+    @staticmethod
+    def read_record(f):
+        header = f.read(_RECORD_HEADER.size)
+        if len(header) < _RECORD_HEADER.size:
+            return None
+        length, crc = _RECORD_HEADER.unpack(header)
+        payload = f.read(length)
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            return None
+        return json.loads(payload)
+
+    def size(self):
+        total = 0
+        for segment in self.segments:
+            try:
+                total += os.path.getsize(self.segment_path(segment))
+            except OSError:
+                pass
+        return total
+
+    def append(self, logs, source=None, max_logs=1000, max_bytes=1024 * 1024, seq=None):
+        """Durably queue logs from one source as one or more size-capped batches"""
+        records = []
+        for batch in split_batches(logs, max_logs, max_bytes):
+            record = {'id': str(uuid.uuid4()), 'source': source, 'logs': batch}
+            if seq is not None:
+                record['seq'] = seq
+            payload = json.dumps(record, separators=(',', ':')).encode('utf-8')
+            records.append(_RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+        if not records:
+            return
+
+        if not self.segments or os.path.getsize(self.segment_path(self.segments[-1])) >= self.segment_bytes:
+            self.roll_segment()
+        if self.writer is None:
+            self.writer = open(self.segment_path(self.segments[-1]), 'ab')
+
+        self.writer.write(b''.join(records))
+        self.writer.flush()
+        os.fsync(self.writer.fileno())
+        self.evict()
+
+    def discard_after(self, seq):
+        """Drop unsent records tagged with a checkpoint seq later than seq"""
+        cursor_segment, cursor_offset = self.cursor
+        for index, segment in enumerate(self.segments):
+            if segment < cursor_segment:
+                continue
+            path = self.segment_path(segment)
+            with open(path, 'rb') as f:
+                position = cursor_offset if segment == cursor_segment else 0
+                f.seek(position)
+                while True:
+                    record = self.read_record(f)
+                    if record is None or record.get('seq', 0) > seq:
+                        break
+                    position = f.tell()
+            if record is None:
+                continue
+
+            # Records are appended in seq order, so everything from here on is uncommitted
+            print(f"[!] Discarding spooled logs from an unsaved checkpoint in {path}")
+            self.close()
+            with open(path, 'r+b') as f:
+                f.truncate(position)
+            for later in self.segments[index + 1:]:
+                os.remove(self.segment_path(later))
+            del self.segments[index + 1:]
+            return
+
+    def roll_segment(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        self.segments.append(self.segments[-1] + 1 if self.segments else 0)
+
+    def evict(self):
+        """Drop the oldest segments while the spool is over its size cap"""
+        while len(self.segments) > 1 and self.size() > self.max_bytes:
+            oldest = self.segments.pop(0)
+            path = self.segment_path(oldest)
+            print(f"[!] Spool over {self.max_bytes} bytes, dropping {os.path.getsize(path)} bytes of oldest logs")
+            os.remove(path)
+            if self.cursor[0] <= oldest:
+                self.cursor = (self.segments[0], 0)
+                self.save_cursor()
+
+    def peek(self, count=1):
+        """Return up to count of the oldest unacknowledged batches.
+
+        Each entry is a (record, position) pair where position is the
+        cursor to acknowledge once that record and all before it are sent.
+        """
+        entries = []
+        cursor_segment, cursor_offset = self.cursor
+        for segment in self.segments:
+            if segment < cursor_segment:
+                continue
+            with open(self.segment_path(segment), 'rb') as f:
+                f.seek(cursor_offset if segment == cursor_segment else 0)
+                while len(entries) < count:
+                    record = self.read_record(f)
+                    if record is None:
+                        break
+                    entries.append((record, (segment, f.tell())))
+            if len(entries) >= count:
+                break
+        return entries
+
+    def ack(self, position):
+        """Mark everything before position as delivered"""
+        self.cursor = position
+        self.save_cursor()
+
+        # Fully delivered segments other than the active one can go
+        while len(self.segments) > 1 and self.segments[0] < position[0]:
+            os.remove(self.segment_path(self.segments.pop(0)))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
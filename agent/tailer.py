@@ -0,0 +1,295 @@
+import ctypes
+import ctypes.util
+import errno
+import json
+import os
+import select
+import struct
+import time
+
+# Bytes read per syscall and per file per collection cycle
+CHUNK_SIZE = 64 * 1024
+MAX_READ_BYTES = 4 * 1024 * 1024
+# Lines longer than this are emitted in pieces
+MAX_LINE_BYTES = 64 * 1024
+
+# inotify constants from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_EVENT_HEADER = struct.Struct('iIII')
+_WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM |
+               IN_MOVED_TO | IN_CREATE | IN_DELETE)
+
+
+class InotifyWatcher:
+    """Blocks until one of the watched files changes (Linux only)"""
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library('c')
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self.watches = {}
+        self.names = {}
+
+    def watch(self, path):
+        """Watch the file's directory so rotations and re-creations are seen"""
+        directory, name = os.path.split(os.path.abspath(path))
+        self.names.setdefault(directory, set()).add(name)
+        if directory in self.watches.values():
+            return
+
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), _WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f'inotify_add_watch failed for {directory}')
+        self.watches[wd] = directory
+
+    def wait(self, timeout):
+        """Wait up to timeout seconds for a change to a watched file"""
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+
+            ready, _, _ = select.select([self.fd], [], [], remaining)
+            if not ready:
+                return False
+            if self.drain():
+                return True
+
+    def drain(self):
+        """Consume pending events, returning True if any concern our files"""
+        relevant = False
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return relevant
+            except OSError as e:
+                if e.errno == errno.EINTR:
+                    continue
+                raise
+
+            pos = 0
+            while pos < len(data):
+                wd, _, _, length = _EVENT_HEADER.unpack_from(data, pos)
+                pos += _EVENT_HEADER.size
+                name = data[pos:pos + length].rstrip(b'\0').decode('utf-8', 'ignore')
+                pos += length
+                if name in self.names.get(self.watches.get(wd), ()):
+                    relevant = True
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Fallback for platforms without inotify: just sleeps"""
+
+    def watch(self, path):
+        pass
+
+    def wait(self, timeout):
+        time.sleep(timeout)
+        return False
+
+    def close(self):
+        pass
+
+
+def create_watcher():
+    try:
+        return InotifyWatcher()
+    except (OSError, AttributeError, TypeError) as e:
+        print(f"[!] inotify unavailable, falling back to polling: {e}")
+        return PollingWatcher()
+
+
+class TailedFile:
+    def __init__(self, path, fh, inode, device):
+        self.path = path
+        self.fh = fh
+        self.inode = inode
+        self.device = device
+        self.partial = b''
+
+    @property
+    def offset(self):
+        """Offset of the last complete line handed out"""
+        return self.fh.tell() - len(self.partial)
+
+
+class FileTailer:
+    """Streams new lines from log files across rotation and truncation.
+
+    Files are read in bounded chunks, rotation is detected by a changed
+    inode at the watched path and truncation by the file shrinking below
+    the read offset. Offsets are checkpointed to disk atomically so a
+    restarted agent resumes where it stopped; callers can store their own
+    state in the same checkpoint so it always matches the offsets. Each
+    checkpoint is numbered (seq), so output written ahead of a checkpoint
+    can be tagged with the number it will be saved under.
+    """
+
+    def __init__(self, offsets_path):
+        self.offsets_path = offsets_path
+        self.state = None
+        self.seq = 0
+        self.offsets = self.load_offsets()
+        self.files = {}
+        self.watcher = create_watcher()
+        self.pending = False
+        self.dirty = False
+
+    def load_offsets(self):
+        if not os.path.exists(self.offsets_path):
+            return {}
+        try:
+            with open(self.offsets_path, 'r') as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[!] Ignoring unreadable offsets file: {e}")
+            return {}
+
+        if 'files' not in checkpoint:
+            # Older checkpoints held only the offsets
+            return checkpoint
+        self.state = checkpoint.get('state')
+        self.seq = checkpoint.get('seq', 0)
+        return checkpoint['files']
+
+    def save_offsets(self, state=None, force=False):
+        """Atomically write the current offsets (and caller state) if they changed.
+
+        force writes a new checkpoint even if nothing changed, e.g. to commit
+        output tagged with seq + 1.
+        """
+        if state is not None and state != self.state:
+            self.state = state
+            self.dirty = True
+        if not self.dirty and not force:
+            return
+
+        for path, state in self.files.items():
+            self.offsets[path] = {
+                'inode': state.inode,
+                'device': state.device,
+                'offset': state.offset
+            }
+
+        tmp_path = f'{self.offsets_path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'files': self.offsets, 'state': self.state, 'seq': self.seq + 1}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.offsets_path)
+        self.seq += 1
+        self.dirty = False
+
+    def is_tracking(self, path):
+        return path in self.files or os.path.exists(path)
+
+    def open_file(self, path, resume=True):
+        try:
+            fh = open(path, 'rb')
+        except OSError:
+            return None
+
+        st = os.fstat(fh.fileno())
+        state = TailedFile(path, fh, st.st_ino, st.st_dev)
+
+        saved = self.offsets.get(path) if resume else None
+        if (saved and saved.get('inode') == st.st_ino and
+                saved.get('device') == st.st_dev and saved.get('offset', 0) <= st.st_size):
+            fh.seek(saved['offset'])
+
+        self.files[path] = state
+        self.watcher.watch(path)
+        self.dirty = True
+        return state
+
+    def check_rotation(self, state):
+        """At EOF: reopen rotated files and rewind truncated ones"""
+        try:
+            st = os.stat(state.path)
+        except FileNotFoundError:
+            # Rotated away and not recreated yet; keep the old handle
+            return False
+
+        if st.st_ino != state.inode or st.st_dev != state.device:
+            state.fh.close()
+            del self.files[state.path]
+            return self.open_file(state.path, resume=False) is not None
+
+        if os.fstat(state.fh.fileno()).st_size < state.fh.tell():
+            state.fh.seek(0)
+            state.partial = b''
+            self.dirty = True
+            return True
+
+        return False
+
+    def read_lines(self, path, max_bytes=MAX_READ_BYTES):
+        """Return new complete lines from path, reading at most max_bytes"""
+        state = self.files.get(path) or self.open_file(path)
+        if state is None:
+            return []
+
+        lines = []
+        budget = max_bytes
+        while budget > 0:
+            chunk = state.fh.read(min(CHUNK_SIZE, budget))
+            if not chunk:
+                leftover = state.partial
+                if self.check_rotation(state):
+                    # An unterminated last line of the old file is still a line
+                    line = leftover.decode('utf-8', 'ignore').strip()
+                    if line:
+                        lines.append(line)
+                    state = self.files[path]
+                    continue
+                break
+
+            budget -= len(chunk)
+            data = state.partial + chunk
+            cut = data.rfind(b'\n')
+            if cut == -1:
+                if len(data) < MAX_LINE_BYTES:
+                    state.partial = data
+                    continue
+                cut = len(data) - 1
+
+            state.partial = data[cut + 1:]
+            for raw in data[:cut + 1].splitlines():
+                line = raw.decode('utf-8', 'ignore').strip()
+                if line:
+                    lines.append(line)
+            self.dirty = True
+
+        if budget <= 0:
+            self.pending = True
+        return lines
+
+    def wait(self, timeout):
+        """Sleep until a tailed file changes or timeout expires"""
+        if self.pending:
+            self.pending = False
+            return True
+        return self.watcher.wait(timeout)
+
+    def close(self):
+        self.save_offsets()
+        for state in self.files.values():
+            state.fh.close()
+        self.files = {}
+        self.watcher.close()
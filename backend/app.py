@@ -1,20 +1,52 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
-from models import Database
+from models import Database, FIELD_COLUMNS, MAX_EVENT_COUNT
 from auth import require_auth
+from caching import conditional
+from columnar import ARROW_STREAM_TYPE, arrow_stream, wants_arrow
+from live import live_feed, parse_cursor
+import hotwindow
+from hotwindow import hot_window
 from datetime import datetime
 import os
+import sys
+import threading
 import uuid
 import json
 
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'shared'))
+import codec
+from parsing import LogParser, TemplateMiner, extract_entities, parse_message, template_group
+
 app = Flask(__name__)
 CORS(app)
 
+def stored_entities(fields, message, hostname):
+    """Entities a stored log is indexed under: those in its fields and text, plus its host"""
+    entities = extract_entities(fields, message)
+    if hostname:
+        entities.add(('host', hostname))
+    return entities
+
 # Initialize database
 Database.init_db()
+Database.backfill_template_groups(template_group)
+Database.backfill_entities(lambda message, hostname: stored_entities(parse_message(message), message, hostname))
+hotwindow.warm()
+
+# Keeps the hot window in id order when ingest requests run concurrently
+ingest_lock = threading.Lock()
+
+# Logs are parsed once here; everything downstream reads the stored fields.
+# Mined templates are reloaded from the database so their ids survive restarts.
+log_parser = LogParser(TemplateMiner(loader=Database.get_group_templates))
 
 # Configuration
 DEBUG = os.getenv('DEBUG', 'True') == 'True'
+MAX_INGEST_BYTES = int(os.getenv('MAX_INGEST_BYTES', 32 * 1024 * 1024))
+
+# Reject oversized (compressed) bodies before they are read
+app.config['MAX_CONTENT_LENGTH'] = MAX_INGEST_BYTES
 
 @app.route('/api/health', methods=['GET'])
 def health():
@@ -43,54 +75,201 @@ def register_agent():
     else:
         return jsonify({'error': 'Agent already registered'}), 400
 
+@app.route('/api/logs/capabilities', methods=['GET'])
+def ingest_capabilities():
+    """Advertise the body encodings accepted by /api/logs/send"""
+    return jsonify({
+        'encodings': codec.supported_encodings(),
+        'formats': codec.supported_formats(),
+        'max_payload_bytes': MAX_INGEST_BYTES
+    }), 200
+
+def validate_log(log):
+    """Return why a log entry cannot be stored, or None if it is usable"""
+    if not isinstance(log, dict):
+        return 'entry is not an object'
+    if not isinstance(log.get('message', ''), str):
+        return 'message must be a string'
+    for key in ('type', 'severity'):
+        if not isinstance(log.get(key, ''), str):
+            return f'{key} must be a string'
+    
+    count = log.get('count', 1)
+    if not isinstance(count, int) or isinstance(count, bool) or count < 1:
+        return 'count must be a positive integer'
+    if count > MAX_EVENT_COUNT:
+        return f'count must be at most {MAX_EVENT_COUNT}'
+    for key in ('first_seen', 'last_seen'):
+        value = log.get(key)
+        if value is None:
+            continue
+        if not isinstance(value, (int, float)) or isinstance(value, bool):
+            return f'{key} must be epoch seconds'
+        try:
+            datetime.fromtimestamp(value)
+        except (OverflowError, OSError, ValueError):
+            return f'{key} is out of range'
+    return None
+
 @app.route('/api/logs/send', methods=['POST'])
 @require_auth
 def send_logs():
     """Receive logs from agents"""
     agent_id = request.headers.get('X-Agent-ID')
-    data = request.json
+    
+    try:
+        body = codec.decompress(
+            request.get_data(cache=False),
+            request.headers.get('Content-Encoding'),
+            MAX_INGEST_BYTES
+        )
+        data = codec.decode_payload(body, request.content_type)
+    except codec.PayloadError as e:
+        error = {'error': str(e)}
+        if e.part:
+            # Lets the agent tell an unreadable format or encoding from a bad batch
+            error['rejected'] = e.part
+        return jsonify(error), e.status
+    
     logs = data.get('logs', [])
     hostname = data.get('hostname', 'unknown')
     
     if not logs:
         return jsonify({'error': 'No logs provided'}), 400
+    if not isinstance(logs, list):
+        return jsonify({'error': 'logs must be a list'}), 400
+    if not isinstance(hostname, str):
+        return jsonify({'error': 'hostname must be a string'}), 400
     
-    inserted_count = 0
-    for log in logs:
-        try:
-            Database.insert_log(
-                agent_id=agent_id,
-                hostname=hostname,
-                log_type=log.get('type', 'unknown'),
-                message=log.get('message', ''),
-                severity=log.get('severity', 'info')
-            )
-            inserted_count += 1
-        except Exception as e:
-            print(f"Error inserting log: {e}")
+    # Skip malformed entries rather than failing (and endlessly retrying) the whole batch
+    valid = []
+    for index, log in enumerate(logs):
+        error = validate_log(log)
+        if error:
+            print(f"Skipping log {index} from {agent_id}: {error}")
+        else:
+            valid.append(log)
+    skipped = len(logs) - len(valid)
+    logs = valid
+    
+    if not logs:
+        return jsonify({'error': 'No valid logs provided', 'skipped': skipped}), 400
+    
+    batch_id = request.headers.get('X-Batch-ID')
+    try:
+        for log in logs:
+            log['fields'] = log_parser.parse(log.get('message', ''))
+            log['entities'] = stored_entities(log['fields'], log.get('message', ''), hostname)
+        with ingest_lock:
+            stored = Database.insert_logs(agent_id, hostname, logs, batch_id=batch_id)
+            if stored:
+                hot_window.extend(stored)
+    except Exception as e:
+        print(f"Error inserting logs: {e}")
+        return jsonify({'error': 'Failed to store logs'}), 500
+    
+    if stored is None:
+        # Replay of a batch we already stored
+        return jsonify({
+            'message': 'Batch already received',
+            'count': 0,
+            'duplicate': True
+        }), 200
+    
+    inserted_count = len(stored)
+    if inserted_count:
+        live_feed.notify()
     
     return jsonify({
         'message': f'{inserted_count} logs inserted',
-        'count': inserted_count
+        'count': inserted_count,
+        'skipped': skipped
     }), 200
 
 @app.route('/api/logs/query', methods=['GET'])
+@conditional('logs')
 def query_logs():
     """Query logs with filters"""
     limit = request.args.get('limit', 100, type=int)
     offset = request.args.get('offset', 0, type=int)
     hostname = request.args.get('hostname', None)
+    fields = {column: request.args.get(column) for column in FIELD_COLUMNS if request.args.get(column)}
+    
+    if wants_arrow(request):
+        batches = hotwindow.iter_recent_log_batches(limit=limit, offset=offset, hostname=hostname, fields=fields)
+        return Response(arrow_stream(batches, Database.get_column_types('logs')), mimetype=ARROW_STREAM_TYPE)
+    
+    logs = hotwindow.get_recent_logs(limit=limit, offset=offset, hostname=hostname, fields=fields)
+    
+    for log in logs:
+        if log.get('fields'):
+            log['fields'] = json.loads(log['fields'])
     
-    logs = Database.get_logs(limit=limit, offset=offset, hostname=hostname)
     return jsonify({
         'count': len(logs),
         'logs': logs
     }), 200
 
+def parse_local_time(value):
+    """Parse an ISO 8601 timestamp as naive local time, which is how logs are stored"""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+@app.route('/api/pivot', methods=['GET'])
+@conditional('logs')
+def pivot():
+    """Logs and per-entity counts for IPs, users, processes or hosts"""
+    entities = [e for e in request.args.getlist('entity') if e]
+    if not entities:
+        return jsonify({'error': 'entity required'}), 400
+    if len(entities) > 20:
+        return jsonify({'error': 'at most 20 entities per pivot'}), 400
+    
+    try:
+        start = parse_local_time(request.args.get('start'))
+        end = parse_local_time(request.args.get('end'))
+    except ValueError:
+        return jsonify({'error': 'start and end must be ISO 8601 timestamps'}), 400
+    
+    limit = request.args.get('limit', 100, type=int)
+    counts, logs = Database.pivot(entities, start=start, end=end,
+                                  entity_type=request.args.get('type'), limit=limit)
+    
+    for log in logs:
+        if log.get('fields'):
+            log['fields'] = json.loads(log['fields'])
+    
+    return jsonify({
+        'counts': counts,
+        'count': len(logs),
+        'logs': logs
+    }), 200
+
+@app.route('/api/logs/templates', methods=['GET'])
+@conditional('logs')
+def list_templates():
+    """Get the most frequent log templates"""
+    limit = request.args.get('limit', 100, type=int)
+    templates = Database.get_templates(limit=limit)
+    return jsonify({
+        'count': len(templates),
+        'templates': templates
+    }), 200
+
 @app.route('/api/alerts/list', methods=['GET'])
+@conditional('alerts')
 def list_alerts():
     """Get all open alerts"""
     status = request.args.get('status', 'open')
+    
+    if wants_arrow(request):
+        batches = Database.iter_alert_batches(status=status)
+        return Response(arrow_stream(batches, Database.get_column_types('alerts')), mimetype=ARROW_STREAM_TYPE)
+    
     alerts = Database.get_alerts(status=status)
     
     for alert in alerts:
@@ -112,7 +291,30 @@ def update_alert(alert_id):
         return jsonify({'error': 'Invalid status'}), 400
     
     Database.update_alert_status(alert_id, status)
+    live_feed.publish_alert(Database.get_alert(alert_id))
     return jsonify({'message': 'Alert updated'}), 200
 
+@app.route('/api/stream', methods=['GET'])
+def stream():
+    """Live tail of new logs and alerts as Server-Sent Events"""
+    types = request.args.get('types', 'log,alert')
+    severity = request.args.get('severity')
+    filters = {
+        'types': tuple(t.strip() for t in types.split(',')),
+        'hostname': request.args.get('hostname'),
+        'log_type': request.args.get('log_type'),
+        'status': request.args.get('status'),
+        'severity': set(severity.split(',')) if severity else None
+    }
+    
+    # EventSource resends Last-Event-ID on reconnect; ?since= works for first connect
+    since = parse_cursor(request.headers.get('Last-Event-ID') or request.args.get('since'))
+    
+    return Response(
+        live_feed.stream(filters, since),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=DEBUG)
@@ -0,0 +1,33 @@
+from functools import wraps
+import zlib
+from flask import request, make_response
+from models import Database
+
+def conditional(*tables):
+    """Answer GETs with an ETag derived from the tables' change counters.
+    
+    A request whose If-None-Match matches gets a bodiless 304, so repeated
+    reads of unchanged data skip the query and serialization entirely.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            versions = Database.get_versions(tables)
+            variant = zlib.crc32(f"{request.full_path}|{request.headers.get('Accept', '')}".encode('utf-8'))
+            etag = '-'.join(f'{table}{version}' for table, version in zip(tables, versions)) + f'-{variant:08x}'
+            
+            if etag in request.if_none_match:
+                response = make_response('', 304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'no-cache'
+            response.vary.add('Accept')
+            return response
+        
+        return decorated
+    
+    return decorator
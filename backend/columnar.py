@@ -0,0 +1,55 @@
+import io
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+ARROW_STREAM_TYPE = 'application/vnd.apache.arrow.stream'
+
+
+def wants_arrow(request):
+    """True when the client asked for Arrow and this server can produce it"""
+    if pa is None:
+        return False
+    if request.args.get('format') == 'arrow':
+        return True
+    # JSON is listed first so wildcard Accept headers keep getting JSON
+    return request.accept_mimetypes.best_match(['application/json', ARROW_STREAM_TYPE]) == ARROW_STREAM_TYPE
+
+
+def _arrow_type(declared):
+    if declared.startswith('INT'):
+        return pa.int64()
+    return pa.string()
+
+
+def arrow_stream(batches, column_types):
+    """Encode (columns, rows) cursor batches as an Arrow IPC stream.
+
+    Each cursor batch becomes one record batch written as soon as it is
+    read, so the response streams without materializing the whole result.
+    The schema comes from the table's declared column types.
+    """
+    sink = io.BytesIO()
+    writer = None
+    schema = None
+
+    for columns, rows in batches:
+        if writer is None:
+            schema = pa.schema([(name, _arrow_type(column_types.get(name, ''))) for name in columns])
+            writer = pa.ipc.new_stream(sink, schema)
+
+        if rows:
+            values = list(zip(*rows))
+            arrays = [pa.array(column, type=field.type, from_pandas=True)
+                      for column, field in zip(values, schema)]
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+
+        yield sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+
+    if writer is not None:
+        writer.close()
+        yield sink.getvalue()
@@ -0,0 +1,232 @@
+import os
+import sys
+import threading
+from array import array
+from collections import deque
+from models import Database, FIELD_COLUMNS, LOG_COLUMNS, MAX_EVENT_COUNT
+
+# Hard caps on the number of records and the approximate bytes they hold
+HOT_WINDOW_RECORDS = int(os.getenv('HOT_WINDOW_RECORDS', 100000))
+HOT_WINDOW_MAX_BYTES = int(os.getenv('HOT_WINDOW_MAX_BYTES', 64 * 1024 * 1024))
+
+# Low-cardinality text columns whose values are interned and shared between records
+INTERNED = frozenset(('agent_id', 'hostname', 'log_type', 'severity', 'timestamp', 'created_at',
+                      'user', 'process', 'template_id'))
+# Filterable columns, each with a value -> slots index so filtered reads skip the scan
+INDEXED = ('hostname', *FIELD_COLUMNS)
+# Fixed per-record overhead of the column slots and index entries, in bytes
+_RECORD_OVERHEAD = 8 * (len(LOG_COLUMNS) + len(INDEXED))
+
+
+class HotWindow:
+    """Ring buffer holding the most recent logs in column arrays.
+
+    Integer columns live in typed arrays and repeated strings are interned,
+    so a record costs little more than its message. The oldest records are
+    evicted once either the record cap or the byte cap is reached; requests
+    the window cannot fully answer return None so callers go to SQLite.
+
+    The lock only covers picking slots; rows are built after it is released
+    and dropped if their slot was overwritten meanwhile, so readers never
+    hold up extend() (and with it ingest).
+    """
+
+    def __init__(self, capacity=HOT_WINDOW_RECORDS, max_bytes=HOT_WINDOW_MAX_BYTES):
+        self.capacity = capacity
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.ids = array('q', bytes(8 * capacity))
+        self.event_counts = array('q', bytes(8 * capacity))
+        self.sizes = array('l', bytes(array('l').itemsize * capacity))
+        self.columns = {name: [None] * capacity for name in LOG_COLUMNS if name not in ('id', 'event_count')}
+        # Slots holding each value, oldest first
+        self.indexes = {name: {} for name in INDEXED}
+        self.head = 0
+        self.count = 0
+        self.bytes = 0
+        # True while the window holds every log in the database
+        self.complete = False
+
+    def _size(self, row):
+        return _RECORD_OVERHEAD + len(row.get('message') or '') + len(row.get('fields') or '')
+
+    def _evict_oldest(self):
+        tail = (self.head - self.count) % self.capacity
+        # Invalidate the id first so concurrent readers of this slot notice
+        self.ids[tail] = -1
+        self.bytes -= self.sizes[tail]
+        for name, index in self.indexes.items():
+            value = self.columns[name][tail]
+            if value is not None:
+                slots = index[value]
+                slots.popleft()
+                if not slots:
+                    del index[value]
+        for values in self.columns.values():
+            values[tail] = None
+        self.count -= 1
+        self.complete = False
+
+    def load(self, rows, complete):
+        """Warm the window from the database (rows oldest first)"""
+        self.extend(rows)
+        with self.lock:
+            self.complete = complete and self.count == len(rows)
+
+    def extend(self, rows):
+        """Append rows (as stored in SQLite, oldest first)"""
+        with self.lock:
+            for row in rows:
+                size = self._size(row)
+                if size > self.max_bytes:
+                    self.complete = False
+                    continue
+                while self.count and (self.count >= self.capacity or self.bytes + size > self.max_bytes):
+                    self._evict_oldest()
+
+                slot = self.head
+                self.event_counts[slot] = min(row.get('event_count') or 1, MAX_EVENT_COUNT)
+                self.sizes[slot] = size
+                for name, values in self.columns.items():
+                    value = row.get(name)
+                    if name in INTERNED and isinstance(value, str):
+                        value = sys.intern(value)
+                    values[slot] = value
+                for name, index in self.indexes.items():
+                    value = self.columns[name][slot]
+                    if value is not None:
+                        index.setdefault(value, deque()).append(slot)
+                # Publish the id last, once the slot is fully written
+                self.ids[slot] = row['id']
+
+                self.head = (slot + 1) % self.capacity
+                self.count += 1
+                self.bytes += size
+
+    def _row(self, slot):
+        row = {name: values[slot] for name, values in self.columns.items()}
+        row['id'] = self.ids[slot]
+        row['event_count'] = self.event_counts[slot]
+        return row
+
+    def _values(self, slot):
+        return tuple(self.ids[slot] if name == 'id' else self.event_counts[slot] if name == 'event_count'
+                     else self.columns[name][slot] for name in LOG_COLUMNS)
+
+    def _read(self, slots, as_tuples=False):
+        """Build rows for (slot, id) pairs outside the lock, or None if any was overwritten"""
+        build = self._values if as_tuples else self._row
+        rows = []
+        for slot, log_id in slots:
+            row = build(slot)
+            if self.ids[slot] != log_id:
+                # Evicted while we were reading it
+                return None
+            rows.append(row)
+        return rows
+
+    def _slots_newest_first(self):
+        for i in range(1, self.count + 1):
+            yield (self.head - i) % self.capacity
+
+    def _matching_slots(self, conditions, wanted):
+        """Up to wanted slots matching every condition, newest first"""
+        if not conditions:
+            return [slot for _, slot in zip(range(wanted), self._slots_newest_first())]
+
+        # Walk the rarest value's slots and check the other conditions on each
+        candidates = min((self.indexes[name].get(value, ()) for name, value in conditions), key=len)
+        matches = []
+        for slot in reversed(candidates):
+            if all(self.columns[name][slot] == value for name, value in conditions):
+                matches.append(slot)
+                if len(matches) >= wanted:
+                    break
+        return matches
+
+    def oldest_id(self):
+        with self.lock:
+            if not self.count:
+                return None
+            return self.ids[(self.head - self.count) % self.capacity]
+
+    def recent(self, limit=1000, offset=0, hostname=None, fields=None, as_tuples=False):
+        """Newest logs matching the filters, or None if older data would be needed.
+
+        Rows are dicts, or tuples in LOG_COLUMNS order when as_tuples is set.
+        """
+        conditions = [(name, value) for name, value in (fields or {}).items() if name in INDEXED and value]
+        if hostname:
+            conditions.append(('hostname', hostname))
+
+        wanted = offset + limit
+        with self.lock:
+            matches = self._matching_slots(conditions, wanted)
+            if len(matches) < wanted and not self.complete:
+                # Older matches may exist in SQLite
+                return None
+            slots = [(slot, self.ids[slot]) for slot in matches[offset:wanted]]
+        return self._read(slots, as_tuples)
+
+    def after(self, log_id, limit=1000):
+        """Logs with id greater than log_id, oldest first, or None if evicted"""
+        with self.lock:
+            if not self.count:
+                return [] if self.complete else None
+            tail = (self.head - self.count) % self.capacity
+            if not self.complete and log_id < self.ids[tail] - 1:
+                return None
+
+            slots = []
+            for slot in self._slots_newest_first():
+                if self.ids[slot] <= log_id:
+                    break
+                slots.append((slot, self.ids[slot]))
+            slots.reverse()
+        return self._read(slots[:limit])
+
+
+hot_window = HotWindow()
+
+
+def warm():
+    """Load the newest stored logs into the window"""
+    max_log_id, _ = Database.get_max_ids()
+    start = max(0, max_log_id - hot_window.capacity)
+    rows = []
+    while True:
+        batch = Database.get_logs_after(rows[-1]['id'] if rows else start, 10000)
+        if not batch:
+            break
+        rows.extend(batch)
+    hot_window.load(rows, complete=start == 0)
+    print(f"[*] Hot window holds {hot_window.count} logs ({hot_window.bytes} bytes)")
+
+
+def get_recent_logs(limit=1000, offset=0, hostname=None, fields=None):
+    """Newest logs from memory, falling back to SQLite for older data"""
+    logs = hot_window.recent(limit=limit, offset=offset, hostname=hostname, fields=fields)
+    if logs is None:
+        logs = Database.get_logs(limit=limit, offset=offset, hostname=hostname, fields=fields)
+    return logs
+
+
+def iter_recent_log_batches(limit=1000, offset=0, hostname=None, fields=None, batch_size=10000):
+    """Column batches of the newest logs from memory, falling back to SQLite"""
+    rows = hot_window.recent(limit=limit, offset=offset, hostname=hostname, fields=fields, as_tuples=True)
+    if rows is None:
+        yield from Database.iter_log_batches(limit=limit, offset=offset, hostname=hostname, fields=fields,
+                                             batch_size=batch_size)
+        return
+    # Like Database.iter_batches, always yield once so an empty result still has columns
+    yield LOG_COLUMNS, rows[:batch_size]
+    for start in range(batch_size, len(rows), batch_size):
+        yield LOG_COLUMNS, rows[start:start + batch_size]
+
+
+def get_logs_after(log_id, limit=1000):
+    """Logs newer than log_id from memory, falling back to SQLite once evicted"""
+    logs = hot_window.after(log_id, limit)
+    if logs is None:
+        logs = Database.get_logs_after(log_id, limit)
+    return logs
@@ -0,0 +1,219 @@
+import json
+import queue
+import threading
+from models import Database
+import hotwindow
+
+# Seconds between polls when nothing wakes the feed earlier
+POLL_INTERVAL = 1.0
+# Seconds of silence before a keepalive comment is sent
+HEARTBEAT_INTERVAL = 15
+# Rows fetched per poll and per catch-up page
+BATCH_SIZE = 1000
+# Max rows replayed to a resuming client before reporting a gap
+CATCHUP_LIMIT = 10000
+# Events buffered per client before it is dropped as too slow
+QUEUE_SIZE = 5000
+
+
+def parse_cursor(value):
+    """Parse a '<log_id>:<alert_id>' resume cursor"""
+    if not value:
+        return None
+    try:
+        log_id, alert_id = value.split(':', 1)
+        return int(log_id), int(alert_id)
+    except ValueError:
+        return None
+
+
+def format_event(kind, row, cursor):
+    """Encode a row as a Server-Sent Event"""
+    data = json.dumps(row, default=str, separators=(',', ':'))
+    return f'id: {cursor[0]}:{cursor[1]}\nevent: {kind}\ndata: {data}\n\n'
+
+
+def _prepare_alert(alert):
+    if alert.get('matched_logs') and isinstance(alert['matched_logs'], str):
+        alert['matched_logs'] = json.loads(alert['matched_logs'])
+    return alert
+
+
+class Subscription:
+    def __init__(self, filters):
+        self.filters = filters
+        self.queue = queue.Queue(maxsize=QUEUE_SIZE)
+
+    def matches(self, kind, row):
+        """Apply the client's server-side filters to an event"""
+        filters = self.filters
+        if kind not in filters.get('types', ('log', 'alert')):
+            return False
+
+        if kind == 'log':
+            if filters.get('hostname') and row.get('hostname') != filters['hostname']:
+                return False
+            if filters.get('log_type') and row.get('log_type') != filters['log_type']:
+                return False
+        elif filters.get('status') and row.get('status') != filters['status']:
+            return False
+
+        if filters.get('severity') and row.get('severity') not in filters['severity']:
+            return False
+        return True
+
+
+class LiveFeed:
+    """Single poller that fans new logs and alerts out to streaming clients.
+
+    One thread tails the logs and alerts tables by id for all subscribers,
+    encodes each event once and hands it to every matching client queue.
+    Alert status changes made through the API are published directly and
+    are not replayed on resume.
+    """
+
+    def __init__(self):
+        self.subscribers = set()
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.last_log_id = 0
+        self.last_alert_id = 0
+        self.thread = None
+
+    def notify(self):
+        """Wake the poller after new rows were committed"""
+        self.wake.set()
+
+    def subscribe(self, filters):
+        """Register a client and return it with the current feed cursor"""
+        sub = Subscription(filters)
+        with self.lock:
+            if not self.subscribers:
+                # Nobody was listening, so the cursor is stale
+                self.last_log_id, self.last_alert_id = Database.get_max_ids()
+            self.subscribers.add(sub)
+            cursor = (self.last_log_id, self.last_alert_id)
+
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, daemon=True)
+                self.thread.start()
+        return sub, cursor
+
+    def unsubscribe(self, sub):
+        with self.lock:
+            self.subscribers.discard(sub)
+
+    def publish_alert(self, alert):
+        """Push an updated alert to clients without waiting for a poll"""
+        if not alert:
+            return
+        alert = _prepare_alert(alert)
+        with self.lock:
+            self.broadcast('alert', alert, (self.last_log_id, self.last_alert_id))
+
+    def broadcast(self, kind, row, cursor):
+        """Queue an event for every matching subscriber (lock must be held)"""
+        event = None
+        for sub in list(self.subscribers):
+            if not sub.matches(kind, row):
+                continue
+            if event is None:
+                event = format_event(kind, row, cursor)
+            try:
+                sub.queue.put_nowait(event)
+            except queue.Full:
+                # Slow client: drop it, it can resume from its last event id
+                self.subscribers.discard(sub)
+                sub.queue = queue.Queue()
+                sub.queue.put(None)
+
+    def poll(self):
+        """Fetch rows committed since the last poll and broadcast them"""
+        with self.lock:
+            log_id, alert_id = self.last_log_id, self.last_alert_id
+
+        logs = hotwindow.get_logs_after(log_id, BATCH_SIZE)
+        alerts = Database.get_alerts_after(alert_id, BATCH_SIZE)
+
+        with self.lock:
+            for log in logs:
+                if log['id'] <= self.last_log_id:
+                    continue
+                self.last_log_id = log['id']
+                self.broadcast('log', log, (self.last_log_id, self.last_alert_id))
+
+            for alert in alerts:
+                if alert['id'] <= self.last_alert_id:
+                    continue
+                self.last_alert_id = alert['id']
+                self.broadcast('alert', _prepare_alert(alert), (self.last_log_id, self.last_alert_id))
+
+        return len(logs) == BATCH_SIZE or len(alerts) == BATCH_SIZE
+
+    def run(self):
+        """Poller loop shared by all connected clients"""
+        while True:
+            self.wake.wait(POLL_INTERVAL)
+            self.wake.clear()
+
+            with self.lock:
+                idle = not self.subscribers
+            if idle:
+                continue
+
+            try:
+                while self.poll():
+                    pass
+            except Exception as e:
+                print(f"Error polling live feed: {e}")
+
+    def catch_up(self, sub, since, until):
+        """Replay rows between a client's resume cursor and the live cursor"""
+        for kind, fetch, start, end in (
+            ('log', hotwindow.get_logs_after, since[0], until[0]),
+            ('alert', Database.get_alerts_after, since[1], until[1]),
+        ):
+            position = start
+            replayed = 0
+            while position < end:
+                rows = fetch(position, BATCH_SIZE)
+                rows = [row for row in rows if row['id'] <= end]
+                if not rows:
+                    break
+                for row in rows:
+                    position = row['id']
+                    if kind == 'alert':
+                        row = _prepare_alert(row)
+                    if sub.matches(kind, row):
+                        cursor = (position, since[1]) if kind == 'log' else (until[0], position)
+                        yield format_event(kind, row, cursor)
+                replayed += len(rows)
+                if replayed >= CATCHUP_LIMIT:
+                    gap = {'type': kind, 'from_id': position, 'to_id': end}
+                    yield f'event: gap\ndata: {json.dumps(gap)}\n\n'
+                    break
+
+    def stream(self, filters, since=None):
+        """Generate the SSE stream for one client"""
+        sub, cursor = self.subscribe(filters)
+        try:
+            yield 'retry: 3000\n\n'
+            if since:
+                yield from self.catch_up(sub, since, cursor)
+
+            while True:
+                try:
+                    event = sub.queue.get(timeout=HEARTBEAT_INTERVAL)
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+                    continue
+
+                if event is None:
+                    yield 'event: overflow\ndata: {}\n\n'
+                    return
+                yield event
+        finally:
+            self.unsubscribe(sub)
+
+
+live_feed = LiveFeed()
@@ -1,9 +1,33 @@
 import sqlite3
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
 import os
 
 DB_PATH = os.path.join(os.path.dirname(__file__), '..', 'database', 'soc.db')
+# How long batch ids are kept for dropping agent replays
+BATCH_ID_RETENTION = timedelta(days=int(os.getenv('BATCH_ID_RETENTION_DAYS', 7)))
+
+# Parsed fields promoted to their own (indexed) columns; the rest go to logs.fields
+FIELD_COLUMNS = ('src_ip', 'user', 'process', 'pid', 'template_id')
+# Largest repeat count one log may carry; batch and rollup sums of many such
+# counts must still fit SQLite's 64-bit integers
+MAX_EVENT_COUNT = 2**32 - 1
+# Columns of the logs table, in table order
+LOG_COLUMNS = ('id', 'agent_id', 'hostname', 'log_type', 'message', 'severity', 'timestamp',
+               'created_at', 'event_count', 'first_seen', 'last_seen', *FIELD_COLUMNS, 'fields')
+
+def _bump_version(cursor, name):
+    """Advance a change counter inside the caller's write transaction"""
+    cursor.execute('INSERT INTO change_counters (name, version) VALUES (?, 1) '
+                   'ON CONFLICT(name) DO UPDATE SET version = version + 1', (name,))
+
+def _hour(value):
+    """Start of the hour a datetime falls in (the entity_counts bucket)"""
+    return value.replace(minute=0, second=0, microsecond=0)
+
+def _from_epoch(value):
+    """Convert agent-supplied epoch seconds to a datetime"""
+    return datetime.fromtimestamp(value) if value else None
 
 class Database:
     @staticmethod
@@ -19,7 +43,86 @@ class Database:
                       message TEXT, 
                       severity TEXT,
                       timestamp DATETIME,
-                      created_at DATETIME DEFAULT CURRENT_TIMESTAMP)''')
+                      created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                      event_count INTEGER DEFAULT 1,
+                      first_seen DATETIME,
+                      last_seen DATETIME,
+                      src_ip TEXT,
+                      user TEXT,
+                      process TEXT,
+                      pid TEXT,
+                      template_id TEXT,
+                      fields TEXT)''')
+        
+        # Columns added after the original schema
+        columns = {row[1] for row in c.execute('PRAGMA table_info(logs)')}
+        for column, definition in (('event_count', 'INTEGER DEFAULT 1'),
+                                   ('first_seen', 'DATETIME'),
+                                   ('last_seen', 'DATETIME'),
+                                   ('src_ip', 'TEXT'),
+                                   ('user', 'TEXT'),
+                                   ('process', 'TEXT'),
+                                   ('pid', 'TEXT'),
+                                   ('template_id', 'TEXT'),
+                                   ('fields', 'TEXT')):
+            if column not in columns:
+                c.execute(f'ALTER TABLE logs ADD COLUMN {column} {definition}')
+        
+        c.execute('CREATE INDEX IF NOT EXISTS idx_logs_src_ip ON logs (src_ip)')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_logs_user ON logs (user)')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_logs_template_id ON logs (template_id)')
+        
+        # Inverted index from entities (IPs, users, processes, hosts) to logs
+        c.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'log_entities'")
+        entities_exist = c.fetchone() is not None
+        c.execute('''CREATE TABLE IF NOT EXISTS log_entities
+                     (entity TEXT,
+                      timestamp DATETIME,
+                      log_id INTEGER,
+                      entity_type TEXT,
+                      event_count INTEGER DEFAULT 1,
+                      PRIMARY KEY (entity, timestamp, log_id, entity_type)) WITHOUT ROWID''')
+        
+        # Hourly per-entity rollup of log_entities, so pivot counts never scan the index
+        c.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'entity_counts'")
+        rollup_exists = c.fetchone() is not None
+        c.execute('''CREATE TABLE IF NOT EXISTS entity_counts
+                     (entity TEXT,
+                      bucket DATETIME,
+                      entity_type TEXT,
+                      log_count INTEGER,
+                      event_count INTEGER,
+                      PRIMARY KEY (entity, bucket, entity_type)) WITHOUT ROWID''')
+        if not rollup_exists:
+            c.execute("INSERT INTO entity_counts (entity, bucket, entity_type, log_count, event_count) "
+                      "SELECT entity, substr(timestamp, 1, 13) || ':00:00', entity_type, COUNT(*), SUM(event_count) "
+                      "FROM log_entities GROUP BY 1, 2, 3")
+        
+        # Logs stored before the entity index existed, still to be indexed by backfill_entities
+        c.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'backfills'")
+        backfills_exist = c.fetchone() is not None
+        c.execute('''CREATE TABLE IF NOT EXISTS backfills
+                     (name TEXT PRIMARY KEY,
+                      last_id INTEGER)''')
+        if not backfills_exist:
+            c.execute('SELECT MIN(log_id) FROM log_entities' if entities_exist else 'SELECT NULL')
+            first_indexed = c.fetchone()[0]
+            if first_indexed is not None:
+                c.execute("INSERT INTO backfills (name, last_id) VALUES ('log_entities', ?)", (first_indexed - 1,))
+            else:
+                c.execute("INSERT INTO backfills (name, last_id) SELECT 'log_entities', MAX(id) FROM logs "
+                          "HAVING MAX(id) IS NOT NULL")
+        
+        c.execute('''CREATE TABLE IF NOT EXISTS log_templates
+                     (template_id TEXT PRIMARY KEY,
+                      template TEXT,
+                      log_count INTEGER DEFAULT 0,
+                      last_seen DATETIME,
+                      group_key TEXT)''')
+        c.execute('PRAGMA table_info(log_templates)')
+        if 'group_key' not in [row[1] for row in c.fetchall()]:
+            c.execute('ALTER TABLE log_templates ADD COLUMN group_key TEXT')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_log_templates_group_key ON log_templates (group_key)')
         
         c.execute('''CREATE TABLE IF NOT EXISTS alerts
                      (id INTEGER PRIMARY KEY,
@@ -41,6 +144,18 @@ class Database:
                       last_seen DATETIME,
                       created_at DATETIME DEFAULT CURRENT_TIMESTAMP)''')
         
+        # Bumped with every write so readers can tell whether data changed
+        c.execute('''CREATE TABLE IF NOT EXISTS change_counters
+                     (name TEXT PRIMARY KEY,
+                      version INTEGER DEFAULT 0)''')
+        
+        c.execute('''CREATE TABLE IF NOT EXISTS ingested_batches
+                     (batch_id TEXT PRIMARY KEY,
+                      agent_id TEXT,
+                      log_count INTEGER,
+                      received_at DATETIME DEFAULT CURRENT_TIMESTAMP)''')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_ingested_batches_received_at ON ingested_batches (received_at)')
+        
         conn.commit()
         conn.close()
     
@@ -51,35 +166,185 @@ class Database:
         timestamp = datetime.now()
         c.execute('INSERT INTO logs (agent_id, hostname, log_type, message, severity, timestamp) VALUES (?, ?, ?, ?, ?, ?)',
                   (agent_id, hostname, log_type, message, severity, timestamp))
-        conn.commit()
         log_id = c.lastrowid
+        _bump_version(c, 'logs')
+        conn.commit()
         conn.close()
         return log_id
     
     @staticmethod
-    def get_logs(limit=1000, offset=0, hostname=None):
+    def insert_logs(agent_id, hostname, logs, batch_id=None):
+        """Insert a batch of logs in one transaction.
+        
+        When batch_id is given the batch is recorded alongside the logs, and a
+        batch that was already stored is skipped; returns None in that case,
+        otherwise the stored rows, oldest first, shaped as get_logs returns them.
+        """
+        timestamp = datetime.now()
+        created_at = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+        
+        rows = []
+        entities = []
+        templates = {}
+        for log in logs:
+            entities.append(log.get('entities') or ())
+            fields = dict(log.get('fields') or {})
+            template = fields.pop('template', None)
+            group_key = fields.pop('template_group', None)
+            promoted = [fields.pop(column, None) for column in FIELD_COLUMNS]
+            rows.append((agent_id, hostname, log.get('type', 'unknown'), log.get('message', ''),
+                         log.get('severity', 'info'), timestamp, created_at, log.get('count', 1),
+                         _from_epoch(log.get('first_seen')), _from_epoch(log.get('last_seen')),
+                         *promoted, json.dumps(fields) if fields else None))
+            if template:
+                template_id = promoted[-1]
+                count = templates[template_id][1] if template_id in templates else 0
+                templates[template_id] = (template, count + log.get('count', 1), group_key)
+        
         conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
         c = conn.cursor()
+        try:
+            if batch_id:
+                # Replays arrive within seconds to hours; older ids only take up space
+                c.execute('DELETE FROM ingested_batches WHERE received_at < ?',
+                          ((datetime.utcnow() - BATCH_ID_RETENTION).strftime('%Y-%m-%d %H:%M:%S'),))
+                c.execute('INSERT INTO ingested_batches (batch_id, agent_id, log_count) VALUES (?, ?, ?)',
+                          (batch_id, agent_id, len(logs)))
+            entity_rows = []
+            stored = []
+            for row, log_entities in zip(rows, entities):
+                c.execute(f'INSERT INTO logs ({", ".join(LOG_COLUMNS[1:])}) '
+                          f'VALUES ({", ".join("?" * len(row))})', row)
+                log_id = c.lastrowid
+                entity_rows.extend((value, timestamp, log_id, entity_type, row[7])
+                                   for entity_type, value in log_entities)
+                stored.append(dict(zip(LOG_COLUMNS, (log_id, *row))))
+            c.executemany('INSERT OR IGNORE INTO log_entities (entity, timestamp, log_id, entity_type, event_count) '
+                          'VALUES (?, ?, ?, ?, ?)', entity_rows)
+            rollup = {}
+            for entity, _, _, entity_type, event_count in entity_rows:
+                totals = rollup.setdefault((entity, entity_type), [0, 0])
+                totals[0] += 1
+                totals[1] += event_count
+            c.executemany('INSERT INTO entity_counts (entity, bucket, entity_type, log_count, event_count) '
+                          'VALUES (?, ?, ?, ?, ?) ON CONFLICT(entity, bucket, entity_type) DO UPDATE SET '
+                          'log_count = log_count + excluded.log_count, event_count = event_count + excluded.event_count',
+                          [(entity, _hour(timestamp), entity_type, log_count, event_count)
+                           for (entity, entity_type), (log_count, event_count) in rollup.items()])
+            c.executemany('INSERT INTO log_templates (template_id, template, log_count, last_seen, group_key) '
+                          'VALUES (?, ?, ?, ?, ?) '
+                          'ON CONFLICT(template_id) DO UPDATE SET template = excluded.template, '
+                          'log_count = log_count + excluded.log_count, last_seen = excluded.last_seen, '
+                          'group_key = excluded.group_key',
+                          [(template_id, template, count, timestamp, group_key)
+                           for template_id, (template, count, group_key) in templates.items()])
+            _bump_version(c, 'logs')
+            conn.commit()
+        except sqlite3.IntegrityError:
+            conn.rollback()
+            return None
+        finally:
+            conn.close()
         
+        for row in stored:
+            for column in ('timestamp', 'first_seen', 'last_seen'):
+                if row[column] is not None:
+                    row[column] = str(row[column])
+        return stored
+    
+    @staticmethod
+    def _logs_filter(hostname=None, fields=None):
+        conditions, params = [], []
         if hostname:
-            c.execute('SELECT * FROM logs WHERE hostname = ? ORDER BY timestamp DESC LIMIT ? OFFSET ?',
-                      (hostname, limit, offset))
-        else:
-            c.execute('SELECT * FROM logs ORDER BY timestamp DESC LIMIT ? OFFSET ?', (limit, offset))
+            conditions.append('hostname = ?')
+            params.append(hostname)
+        for column, value in (fields or {}).items():
+            if column in FIELD_COLUMNS and value:
+                conditions.append(f'{column} = ?')
+                params.append(value)
+        
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ''
+        return where, params
+    
+    @staticmethod
+    def get_logs(limit=1000, offset=0, hostname=None, fields=None):
+        """Get the newest logs, optionally filtered by hostname and parsed fields"""
+        conn = sqlite3.connect(DB_PATH)
+        conn.row_factory = sqlite3.Row
+        c = conn.cursor()
+        
+        where, params = Database._logs_filter(hostname, fields)
+        c.execute(f'SELECT * FROM logs {where}ORDER BY timestamp DESC LIMIT ? OFFSET ?',
+                  (*params, limit, offset))
         
         logs = [dict(row) for row in c.fetchall()]
         conn.close()
         return logs
     
+    @staticmethod
+    def iter_batches(query, params, batch_size=10000):
+        """Yield (columns, rows) straight from the cursor, batch_size rows at a time.
+        
+        Always yields at least once so callers learn the columns of an
+        empty result. Rows are plain tuples; no per-row dicts are built.
+        """
+        conn = sqlite3.connect(DB_PATH)
+        try:
+            c = conn.cursor()
+            c.execute(query, params)
+            columns = [d[0] for d in c.description]
+            rows = c.fetchmany(batch_size)
+            yield columns, rows
+            while len(rows) == batch_size:
+                rows = c.fetchmany(batch_size)
+                if rows:
+                    yield columns, rows
+        finally:
+            conn.close()
+    
+    @staticmethod
+    def iter_log_batches(limit=1000, offset=0, hostname=None, fields=None, batch_size=10000):
+        """Column batches of the newest logs, same filters as get_logs"""
+        where, params = Database._logs_filter(hostname, fields)
+        return Database.iter_batches(f'SELECT * FROM logs {where}ORDER BY timestamp DESC LIMIT ? OFFSET ?',
+                                     (*params, limit, offset), batch_size)
+    
+    @staticmethod
+    def iter_alert_batches(status='open', batch_size=10000):
+        """Column batches of alerts, same filter as get_alerts"""
+        return Database.iter_batches('SELECT * FROM alerts WHERE status = ? ORDER BY triggered_at DESC',
+                                     (status,), batch_size)
+    
+    @staticmethod
+    def get_column_types(table):
+        """Declared SQLite type of each column in table"""
+        conn = sqlite3.connect(DB_PATH)
+        c = conn.cursor()
+        c.execute(f'PRAGMA table_info({table})')
+        types = {row[1]: row[2].upper() for row in c.fetchall()}
+        conn.close()
+        return types
+    
+    @staticmethod
+    def get_logs_after(log_id, limit=1000):
+        """Get logs with an id greater than log_id, oldest first"""
+        conn = sqlite3.connect(DB_PATH)
+        conn.row_factory = sqlite3.Row
+        c = conn.cursor()
+        c.execute('SELECT * FROM logs WHERE id > ? ORDER BY id ASC LIMIT ?', (log_id, limit))
+        logs = [dict(row) for row in c.fetchall()]
+        conn.close()
+        return logs
+    
     @staticmethod
     def insert_alert(rule_id, rule_name, severity, description, matched_logs):
         conn = sqlite3.connect(DB_PATH)
         c = conn.cursor()
         c.execute('INSERT INTO alerts (rule_id, rule_name, severity, description, matched_logs) VALUES (?, ?, ?, ?, ?)',
                   (rule_id, rule_name, severity, description, json.dumps(matched_logs)))
-        conn.commit()
         alert_id = c.lastrowid
+        _bump_version(c, 'alerts')
+        conn.commit()
         conn.close()
         return alert_id
     
@@ -93,11 +358,208 @@ class Database:
         conn.close()
         return alerts
     
+    @staticmethod
+    def pivot(entities, start=None, end=None, entity_type=None, limit=100):
+        """Find logs involving any of the given entities within a time range.
+        
+        Returns per-entity row and event counts plus the newest matching logs.
+        Counts add up whole hours from the entity_counts rollup and scan the
+        log_entities index only for the partial hours at either end, so their
+        cost does not grow with the size of the range.
+        """
+        conn = sqlite3.connect(DB_PATH)
+        conn.row_factory = sqlite3.Row
+        c = conn.cursor()
+        
+        conditions, params = ['entity = ?'], []
+        if start:
+            conditions.append('timestamp >= ?')
+            params.append(start)
+        if end:
+            conditions.append('timestamp <= ?')
+            params.append(end)
+        if entity_type:
+            conditions.append('entity_type = ?')
+            params.append(entity_type)
+        where = ' AND '.join(conditions)
+        
+        # Whole hours [first_hour, last_hour) come from the rollup, the rest from the index
+        first_hour = _hour(start) + timedelta(hours=1) if start and start != _hour(start) else start
+        last_hour = _hour(end) if end else None
+        if first_hour and last_hour and first_hour >= last_hour:
+            bucket_ranges, edges = None, [(start, end, '<=')]
+        else:
+            bucket_ranges = (first_hour, last_hour)
+            edges = []
+            if start and start != first_hour:
+                edges.append((start, first_hour, '<'))
+            if end:
+                edges.append((last_hour, end, '<='))
+        
+        type_filter = ' AND entity_type = ?' if entity_type else ''
+        type_params = [entity_type] if entity_type else []
+        
+        counts = {}
+        for entity in entities:
+            log_count = event_count = 0
+            if bucket_ranges:
+                bucket_conditions, bucket_params = ['entity = ?'], [entity]
+                if bucket_ranges[0]:
+                    bucket_conditions.append('bucket >= ?')
+                    bucket_params.append(bucket_ranges[0])
+                if bucket_ranges[1]:
+                    bucket_conditions.append('bucket < ?')
+                    bucket_params.append(bucket_ranges[1])
+                c.execute('SELECT COALESCE(SUM(log_count), 0), COALESCE(SUM(event_count), 0) FROM entity_counts '
+                          f"WHERE {' AND '.join(bucket_conditions)}{type_filter}", (*bucket_params, *type_params))
+                log_count, event_count = c.fetchone()
+            for low, high, high_op in edges:
+                c.execute('SELECT COUNT(*), COALESCE(SUM(event_count), 0) FROM log_entities '
+                          f'WHERE entity = ? AND timestamp >= ? AND timestamp {high_op} ?{type_filter}',
+                          (entity, low, high, *type_params))
+                edge_logs, edge_events = c.fetchone()
+                log_count += edge_logs
+                event_count += edge_events
+            counts[entity] = {'logs': log_count, 'events': event_count}
+        
+        # Newest matches per entity, merged; each branch is an index range scan
+        branch = f'SELECT log_id, timestamp FROM (SELECT log_id, timestamp FROM log_entities WHERE {where} ' \
+                 'ORDER BY timestamp DESC LIMIT ?)'
+        union = ' UNION '.join([branch] * len(entities))
+        branch_params = [value for entity in entities for value in (entity, *params, limit)]
+        c.execute(f'SELECT logs.* FROM ({union}) AS hits JOIN logs ON logs.id = hits.log_id '
+                  'ORDER BY hits.timestamp DESC, logs.id DESC LIMIT ?', (*branch_params, limit))
+        logs = [dict(row) for row in c.fetchall()]
+        conn.close()
+        return counts, logs
+    
+    @staticmethod
+    def get_group_templates(group_key):
+        """Get the stored (template_id, template) pairs of one template miner group"""
+        conn = sqlite3.connect(DB_PATH)
+        c = conn.cursor()
+        c.execute('SELECT template_id, template FROM log_templates WHERE group_key = ?', (group_key,))
+        templates = c.fetchall()
+        conn.close()
+        return templates
+    
+    @staticmethod
+    def backfill_template_groups(group_of):
+        """Set group_key on templates stored before it was recorded"""
+        conn = sqlite3.connect(DB_PATH)
+        c = conn.cursor()
+        c.execute('SELECT template_id, template FROM log_templates WHERE group_key IS NULL')
+        c.executemany('UPDATE log_templates SET group_key = ? WHERE template_id = ?',
+                      [(group_of((template or '').split()), template_id) for template_id, template in c.fetchall()])
+        conn.commit()
+        conn.close()
+    
+    @staticmethod
+    def backfill_entities(entities_of, batch_size=5000):
+        """Index the entities of logs stored before log_entities existed.
+        
+        entities_of(message, hostname) returns (entity_type, value) pairs.
+        Works newest first in batches, recording progress with each one so
+        an interrupted backfill resumes where it stopped.
+        """
+        conn = sqlite3.connect(DB_PATH)
+        c = conn.cursor()
+        indexed = 0
+        while True:
+            c.execute("SELECT last_id FROM backfills WHERE name = 'log_entities'")
+            row = c.fetchone()
+            if row is None:
+                break
+            c.execute('SELECT id, hostname, message, timestamp, event_count FROM logs '
+                      'WHERE id <= ? ORDER BY id DESC LIMIT ?', (row[0], batch_size))
+            logs = c.fetchall()
+            if not logs:
+                c.execute("DELETE FROM backfills WHERE name = 'log_entities'")
+                conn.commit()
+                break
+            
+            entity_rows = []
+            rollup = {}
+            for log_id, hostname, message, timestamp, event_count in logs:
+                event_count = event_count or 1
+                for entity_type, value in entities_of(message or '', hostname):
+                    entity_rows.append((value, timestamp, log_id, entity_type, event_count))
+                    totals = rollup.setdefault((value, str(timestamp)[:13] + ':00:00', entity_type), [0, 0])
+                    totals[0] += 1
+                    totals[1] += event_count
+            c.executemany('INSERT OR IGNORE INTO log_entities (entity, timestamp, log_id, entity_type, event_count) '
+                          'VALUES (?, ?, ?, ?, ?)', entity_rows)
+            c.executemany('INSERT INTO entity_counts (entity, bucket, entity_type, log_count, event_count) '
+                          'VALUES (?, ?, ?, ?, ?) ON CONFLICT(entity, bucket, entity_type) DO UPDATE SET '
+                          'log_count = log_count + excluded.log_count, event_count = event_count + excluded.event_count',
+                          [(*key, log_count, event_count) for key, (log_count, event_count) in rollup.items()])
+            c.execute("UPDATE backfills SET last_id = ? WHERE name = 'log_entities'", (logs[-1][0] - 1,))
+            _bump_version(c, 'logs')
+            conn.commit()
+            indexed += len(logs)
+        conn.close()
+        if indexed:
+            print(f"[*] Indexed entities of {indexed} older logs")
+    
+    @staticmethod
+    def get_templates(limit=100):
+        """Get the most frequent mined log templates"""
+        conn = sqlite3.connect(DB_PATH)
+        conn.row_factory = sqlite3.Row
+        c = conn.cursor()
+        c.execute('SELECT * FROM log_templates ORDER BY log_count DESC LIMIT ?', (limit,))
+        templates = [dict(row) for row in c.fetchall()]
+        conn.close()
+        return templates
+    
+    @staticmethod
+    def get_alert(alert_id):
+        conn = sqlite3.connect(DB_PATH)
+        conn.row_factory = sqlite3.Row
+        c = conn.cursor()
+        c.execute('SELECT * FROM alerts WHERE id = ?', (alert_id,))
+        row = c.fetchone()
+        conn.close()
+        return dict(row) if row else None
+    
+    @staticmethod
+    def get_alerts_after(alert_id, limit=1000):
+        """Get alerts with an id greater than alert_id, oldest first"""
+        conn = sqlite3.connect(DB_PATH)
+        conn.row_factory = sqlite3.Row
+        c = conn.cursor()
+        c.execute('SELECT * FROM alerts WHERE id > ? ORDER BY id ASC LIMIT ?', (alert_id, limit))
+        alerts = [dict(row) for row in c.fetchall()]
+        conn.close()
+        return alerts
+    
+    @staticmethod
+    def get_versions(names):
+        """Get the current change counters for the given tables"""
+        conn = sqlite3.connect(DB_PATH)
+        c = conn.cursor()
+        c.execute(f"SELECT name, version FROM change_counters WHERE name IN ({', '.join('?' * len(names))})",
+                  tuple(names))
+        versions = dict(c.fetchall())
+        conn.close()
+        return [versions.get(name, 0) for name in names]
+    
+    @staticmethod
+    def get_max_ids():
+        """Get the newest log and alert ids"""
+        conn = sqlite3.connect(DB_PATH)
+        c = conn.cursor()
+        c.execute('SELECT (SELECT COALESCE(MAX(id), 0) FROM logs), (SELECT COALESCE(MAX(id), 0) FROM alerts)')
+        max_log_id, max_alert_id = c.fetchone()
+        conn.close()
+        return max_log_id, max_alert_id
+    
     @staticmethod
     def update_alert_status(alert_id, status):
         conn = sqlite3.connect(DB_PATH)
         c = conn.cursor()
         c.execute('UPDATE alerts SET status = ? WHERE id = ?', (status, alert_id))
+        _bump_version(c, 'alerts')
         conn.commit()
         conn.close()
     
@@ -0,0 +1,235 @@
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'shared'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'agent'))
+import codec
+from log_agent import LogAgent
+
+USERS = ['alice', 'bob', 'carol', 'deploy', 'backup', 'www-data']
+PATHS = ['/', '/login', '/api/orders', '/api/users', '/static/app.js', '/health']
+
+
+def _ip(rng):
+    return f'10.{rng.randint(0, 3)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}'
+
+
+# Background traffic: (log type, weight, line factories)
+LOG_MIX = [
+    ('auth', 30, [
+        lambda r: f'sshd[{r.randint(1000, 60000)}]: Accepted publickey for {r.choice(USERS)} from {_ip(r)} port {r.randint(1024, 65535)} ssh2',
+        lambda r: f'sshd[{r.randint(1000, 60000)}]: Failed password for {r.choice(USERS)} from {_ip(r)} port {r.randint(1024, 65535)} ssh2',
+        lambda r: f'sshd[{r.randint(1000, 60000)}]: pam_unix(sshd:session): session closed for user {r.choice(USERS)}',
+        lambda r: f'sudo: {r.choice(USERS)} : TTY=pts/{r.randint(0, 9)} ; PWD=/home/{r.choice(USERS)} ; USER=root ; COMMAND=/usr/bin/systemctl status nginx',
+    ]),
+    ('syslog', 40, [
+        lambda r: f'CRON[{r.randint(1000, 60000)}]: (root) CMD (run-parts /etc/cron.hourly)',
+        lambda r: f'systemd[1]: Started Session {r.randint(1, 9999)} of user {r.choice(USERS)}.',
+        lambda r: f'kernel: [UFW BLOCK] IN=eth0 OUT= SRC={_ip(r)} DST=10.0.0.5 LEN=60 PROTO=TCP SPT={r.randint(1024, 65535)} DPT={r.choice([22, 80, 443, 3306])}',
+        lambda r: f'systemd-logind[{r.randint(300, 900)}]: New session {r.randint(1, 9999)} of user {r.choice(USERS)}.',
+    ]),
+    ('application', 20, [
+        lambda r: f'app[{r.randint(1000, 60000)}]: INFO - GET {r.choice(PATHS)} 200 {r.randint(1, 900)}ms',
+        lambda r: f'app[{r.randint(1000, 60000)}]: WARN - High memory usage detected ({r.randint(70, 95)}%)',
+        lambda r: f'app[{r.randint(1000, 60000)}]: ERROR - Database connection failed after {r.randint(1, 5)} retries',
+    ]),
+    ('network', 10, [
+        lambda r: f'nginx[{r.randint(1000, 60000)}]: upstream timed out while connecting to upstream, client: {_ip(r)}',
+        lambda r: f'haproxy[{r.randint(1000, 60000)}]: {_ip(r)}:{r.randint(1024, 65535)} connection reset by peer',
+    ]),
+]
+
+# Brute-force bursts come from the benchmarking range (198.18.0.0/15), one address
+# per burst, so they never collide with background traffic
+BURST_NETWORK = '198.18'
+
+
+def _syslog_prefix(hostname):
+    return f"{datetime.now().strftime('%b %d %H:%M:%S')} {hostname} "
+
+
+def background_logs(rng, hostname, count):
+    """Draw count lines from the weighted background mix"""
+    types = [entry[0] for entry in LOG_MIX]
+    weights = [entry[1] for entry in LOG_MIX]
+    factories = {entry[0]: entry[2] for entry in LOG_MIX}
+    prefix = _syslog_prefix(hostname)
+
+    logs = []
+    for log_type in rng.choices(types, weights=weights, k=count):
+        message = prefix + rng.choice(factories[log_type])(rng)
+        logs.append({'type': log_type, 'message': message, 'severity': LogAgent.determine_severity(message)})
+    return logs
+
+
+def burst_logs(rng, hostname, ip, count):
+    """A brute-force attempt: count failed logins from one address"""
+    prefix = _syslog_prefix(hostname)
+    pid = rng.randint(1000, 60000)
+    logs = []
+    for _ in range(count):
+        message = (f'{prefix}sshd[{pid}]: Failed password for invalid user {rng.choice(["admin", "oracle", "test"])} '
+                   f'from {ip} port {rng.randint(1024, 65535)} ssh2')
+        logs.append({'type': 'auth', 'message': message, 'severity': LogAgent.determine_severity(message)})
+    return logs
+
+
+class InProcessTransport:
+    """Calls the Flask app through its test client, one client per thread"""
+
+    def __init__(self, app):
+        self.app = app
+        self.local = threading.local()
+
+    def request(self, method, path, body=None, headers=None, params=None):
+        client = getattr(self.local, 'client', None)
+        if client is None:
+            client = self.local.client = self.app.test_client()
+        response = client.open(path, method=method, data=body, headers=headers or {}, query_string=params)
+        return response.status_code, response.get_json(silent=True)
+
+
+class HttpTransport:
+    """Calls a running backend over HTTP, one keep-alive session per thread"""
+
+    def __init__(self, url):
+        import requests
+        self.requests = requests
+        self.url = url.rstrip('/')
+        self.local = threading.local()
+
+    def request(self, method, path, body=None, headers=None, params=None):
+        session = getattr(self.local, 'session', None)
+        if session is None:
+            session = self.local.session = self.requests.Session()
+        response = session.request(method, self.url + path, data=body, headers=headers, params=params, timeout=30)
+        try:
+            return response.status_code, response.json()
+        except ValueError:
+            return response.status_code, None
+
+
+class BurstSchedule:
+    """Hands out one brute-force burst every interval seconds to whichever agent asks first"""
+
+    def __init__(self, interval, size):
+        self.interval = interval
+        self.size = size
+        self.lock = threading.Lock()
+        self.next_at = time.monotonic() + interval
+        self.counter = 0
+        self.sent = []
+
+    def take(self):
+        if not self.interval:
+            return None
+        with self.lock:
+            now = time.monotonic()
+            if now < self.next_at:
+                return None
+            self.next_at = now + self.interval
+            self.counter += 1
+            return f'{BURST_NETWORK}.{self.counter // 254 % 256}.{self.counter % 254 + 1}'
+
+    def record(self, ip, sent_at):
+        with self.lock:
+            self.sent.append({'ip': ip, 'sent_at': sent_at})
+
+
+class SimulatedAgent(threading.Thread):
+    """Registers like LogAgent, then ships batches until the deadline"""
+
+    def __init__(self, index, transport, deadline, bursts, batch_size=200, rate=0, seed=0):
+        super().__init__(name=f'bench-agent-{index}', daemon=True)
+        self.hostname = f'bench-host-{index:03d}'
+        self.transport = transport
+        self.deadline = deadline
+        self.bursts = bursts
+        self.batch_size = batch_size
+        self.rate = rate
+        self.rng = random.Random(seed + index)
+        self.latencies = []
+        self.events = 0
+        self.errors = 0
+
+    def register(self):
+        status, body = self.transport.request(
+            'POST', '/api/agents/register',
+            body=json.dumps({'hostname': f'{self.hostname}-{uuid.uuid4().hex[:8]}'}),
+            headers={'Content-Type': codec.JSON_TYPE}
+        )
+        if status != 201:
+            raise RuntimeError(f'Registration failed for {self.hostname}: {status} {body}')
+        self.headers = {'X-Agent-ID': body['agent_id'], 'X-API-Key': body['api_key']}
+
+        status, caps = self.transport.request('GET', '/api/logs/capabilities')
+        caps = caps if status == 200 else {}
+        self.content_type = codec.negotiate(caps.get('formats', []), codec.supported_formats()) or codec.JSON_TYPE
+        self.content_encoding = codec.negotiate(caps.get('encodings', []), codec.supported_encodings()) or 'identity'
+
+    def send(self, logs):
+        headers = dict(self.headers, **{'Content-Type': self.content_type, 'X-Batch-ID': uuid.uuid4().hex})
+        body = codec.encode_payload({'hostname': self.hostname, 'logs': logs}, self.content_type)
+        if self.content_encoding != 'identity':
+            body = codec.compress(body, self.content_encoding)
+            headers['Content-Encoding'] = self.content_encoding
+
+        started = time.perf_counter()
+        status, _ = self.transport.request('POST', '/api/logs/send', body=body, headers=headers)
+        self.latencies.append(time.perf_counter() - started)
+        if status != 200:
+            self.errors += 1
+            return False
+        self.events += len(logs)
+        return True
+
+    def run(self):
+        while time.monotonic() < self.deadline:
+            started = time.monotonic()
+            logs = background_logs(self.rng, self.hostname, self.batch_size)
+
+            ip = self.bursts.take()
+            if ip:
+                logs.extend(burst_logs(self.rng, self.hostname, ip, self.bursts.size))
+
+            if self.send(logs) and ip:
+                self.bursts.record(ip, time.monotonic())
+
+            if self.rate:
+                # Pace to rate events/sec for this agent
+                time.sleep(max(0.0, len(logs) / self.rate - (time.monotonic() - started)))
+
+
+class QueryLoad(threading.Thread):
+    """Polls /api/logs/query the way the dashboard and analysts do"""
+
+    def __init__(self, index, transport, deadline, bursts):
+        super().__init__(name=f'bench-reader-{index}', daemon=True)
+        self.transport = transport
+        self.deadline = deadline
+        self.bursts = bursts
+        self.rng = random.Random(1000 + index)
+        self.latencies = []
+        self.errors = 0
+
+    def queries(self):
+        queries = [{'limit': 100}, {'limit': 1000}, {'limit': 100, 'user': self.rng.choice(USERS)}]
+        if self.bursts.sent:
+            queries.append({'limit': 100, 'src_ip': self.rng.choice(self.bursts.sent)['ip']})
+        return queries
+
+    def run(self):
+        while time.monotonic() < self.deadline:
+            params = self.rng.choice(self.queries())
+            started = time.perf_counter()
+            status, _ = self.transport.request('GET', '/api/logs/query', params=params)
+            self.latencies.append(time.perf_counter() - started)
+            if status != 200:
+                self.errors += 1
+            time.sleep(0.05)
@@ -0,0 +1,323 @@
+"""End-to-end load benchmark for the SOC backend and detection engine.
+
+Simulates concurrent agents shipping a realistic log mix with periodic
+brute-force bursts, while readers poll /api/logs/query and the detection
+engine runs in a loop. Writes a JSON report and checks it against the
+profile's regression thresholds (and optionally a previous report).
+
+    python benchmarks/run_benchmark.py --profile steady
+    python benchmarks/run_benchmark.py --profile peak --baseline benchmarks/results/<old>.json
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'backend'))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'server'))
+
+import models
+from loadgen import BurstSchedule, HttpTransport, InProcessTransport, QueryLoad, SimulatedAgent
+
+PROFILES_PATH = os.path.join(BENCH_DIR, 'thresholds.json')
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+BRUTE_FORCE_RULE = 'rule_001'
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize_ms(seconds):
+    return {
+        'count': len(seconds),
+        'p50': _round(percentile(seconds, 50), 1000),
+        'p99': _round(percentile(seconds, 99), 1000),
+        'max': _round(max(seconds) if seconds else None, 1000),
+    }
+
+
+def _round(value, scale=1):
+    return None if value is None else round(value * scale, 3)
+
+
+def db_size(path):
+    """Bytes on disk for the database including its WAL and shared-memory files"""
+    return sum(os.path.getsize(path + suffix) for suffix in ('', '-wal', '-shm') if os.path.exists(path + suffix))
+
+
+def table_counts():
+    conn = sqlite3.connect(models.DB_PATH)
+    counts = {table: conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+              for table in ('logs', 'log_entities', 'log_templates', 'alerts')}
+    conn.close()
+    return counts
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class DetectionProbe(threading.Thread):
+    """Runs DetectionEngine in a loop and times how long each burst takes to alert.
+
+    A burst counts as detected once a brute-force alert lists one of the
+    burst's log ids; the lag runs from the burst's send completing to the
+    end of the analysis pass that raised the alert.
+    """
+
+    def __init__(self, transport, bursts, interval):
+        super().__init__(name='bench-detector', daemon=True)
+        from detector import DetectionEngine
+
+        probe = self
+
+        class BenchDetectionEngine(DetectionEngine):
+            def fetch_recent_logs(self, limit=500):
+                # Same read path as production, through whichever transport is being benchmarked
+                status, body = transport.request('GET', '/api/logs/query', params={'limit': limit})
+                return body['logs'] if status == 200 else models.Database.get_logs(limit=limit)
+
+            def trigger_alert(self, rule, matched_log_ids):
+                probe.alerts += 1
+                return models.Database.insert_alert(rule['id'], rule['name'], rule['severity'],
+                                                    rule['description'], matched_log_ids)
+
+        self.engine = BenchDetectionEngine()
+        self.bursts = bursts
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.last_alert_id = models.Database.get_max_ids()[1]
+        self.pass_times = []
+        self.lags = {}
+        self.burst_ids = {}
+        self.alerts = 0
+
+    def burst_log_ids(self, ip):
+        if ip not in self.burst_ids:
+            logs = models.Database.get_logs(limit=self.bursts.size, fields={'src_ip': ip})
+            if len(logs) >= self.bursts.size:
+                self.burst_ids[ip] = {log['id'] for log in logs}
+        return self.burst_ids.get(ip, set())
+
+    def check(self, finished_at):
+        matched = set()
+        for alert in models.Database.get_alerts_after(self.last_alert_id, 10000):
+            self.last_alert_id = alert['id']
+            if alert['rule_id'] == BRUTE_FORCE_RULE:
+                matched.update(json.loads(alert['matched_logs'] or '[]'))
+
+        for burst in list(self.bursts.sent):
+            if burst['ip'] in self.lags:
+                continue
+            if matched & self.burst_log_ids(burst['ip']):
+                self.lags[burst['ip']] = finished_at - burst['sent_at']
+
+    def run(self):
+        while not self.stop_event.is_set():
+            started = time.perf_counter()
+            self.engine.analyze_logs()
+            self.pass_times.append(time.perf_counter() - started)
+            self.check(time.monotonic())
+            self.stop_event.wait(self.interval)
+
+    def stop(self):
+        self.stop_event.set()
+        self.join()
+
+
+def run(args):
+    if args.url:
+        transport = HttpTransport(args.url)
+        mode = 'http'
+    else:
+        # In-process runs get a throwaway database so they never touch real data
+        workdir = tempfile.mkdtemp(prefix='soc-bench-')
+        models.DB_PATH = os.path.join(workdir, 'soc.db')
+        import app
+        transport = InProcessTransport(app.app)
+        mode = 'in-process'
+
+    models.Database.init_db()
+    size_before = db_size(models.DB_PATH)
+    counts_before = table_counts()
+
+    bursts = BurstSchedule(args.burst_interval, args.burst_size)
+    deadline = time.monotonic() + args.duration
+    agents = [SimulatedAgent(i, transport, deadline, bursts, args.batch_size, args.rate, args.seed)
+              for i in range(args.agents)]
+    for agent in agents:
+        agent.register()
+    readers = [QueryLoad(i, transport, deadline, bursts) for i in range(args.readers)]
+    probe = DetectionProbe(transport, bursts, args.detect_interval)
+
+    print(f"[*] {mode}: {args.agents} agents, {args.readers} readers, {args.duration}s, db {models.DB_PATH}")
+    started = time.monotonic()
+    probe.start()
+    for worker in agents + readers:
+        worker.start()
+    for worker in agents + readers:
+        worker.join()
+    elapsed = time.monotonic() - started
+
+    # Give bursts sent near the end one more chance to be picked up
+    time.sleep(args.detect_interval)
+    probe.stop()
+
+    events = sum(agent.events for agent in agents)
+    counts_after = table_counts()
+    growth = db_size(models.DB_PATH) - size_before
+    lags = list(probe.lags.values())
+    missed = len(bursts.sent) - len(lags)
+
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {
+            'profile': args.profile,
+            'mode': mode,
+            'agents': args.agents,
+            'readers': args.readers,
+            'duration_s': args.duration,
+            'batch_size': args.batch_size,
+            'rate_per_agent': args.rate,
+            'burst_interval_s': args.burst_interval,
+            'burst_size': args.burst_size,
+            'detect_interval_s': args.detect_interval,
+            'content_type': agents[0].content_type if agents else None,
+            'content_encoding': agents[0].content_encoding if agents else None,
+        },
+        'metrics': {
+            'ingest_events_per_sec': round(events / elapsed, 1),
+            'events_sent': events,
+            'send_errors': sum(agent.errors for agent in agents),
+            'send_latency_ms': summarize_ms([v for agent in agents for v in agent.latencies]),
+            'query_latency_ms': summarize_ms([v for reader in readers for v in reader.latencies]),
+            'query_errors': sum(reader.errors for reader in readers),
+            'detection_pass_ms': summarize_ms(probe.pass_times),
+            'detection_lag_s': {
+                'count': len(lags),
+                'p50': _round(percentile(lags, 50)),
+                'p99': _round(percentile(lags, 99)),
+                'max': _round(max(lags) if lags else None),
+            },
+            'bursts_sent': len(bursts.sent),
+            'bursts_missed': missed,
+            'bursts_missed_ratio': round(missed / len(bursts.sent), 3) if bursts.sent else 0.0,
+            'alerts_raised': probe.alerts,
+            'db_growth_bytes': growth,
+            'db_bytes_per_event': round(growth / events, 1) if events else None,
+            'rows_added': {table: counts_after[table] - counts_before[table] for table in counts_after},
+        },
+    }
+
+
+def metric(report, path):
+    value = report.get('metrics', {})
+    for key in path.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def check(report, thresholds, baseline=None, tolerance=0.2):
+    """Compare metrics to absolute limits and, if given, to a baseline report"""
+    failures = []
+    for path, limit in thresholds.items():
+        value = metric(report, path)
+        if value is None:
+            continue
+        if 'min' in limit and value < limit['min']:
+            failures.append(f'{path} = {value} is below the minimum {limit["min"]}')
+        if 'max' in limit and value > limit['max']:
+            failures.append(f'{path} = {value} is above the maximum {limit["max"]}')
+
+        previous = metric(baseline, path) if baseline else None
+        if not previous:
+            continue
+        if 'min' in limit and value < previous * (1 - tolerance):
+            failures.append(f'{path} = {value} regressed from {previous} (baseline {baseline.get("commit")})')
+        if 'max' in limit and value > previous * (1 + tolerance):
+            failures.append(f'{path} = {value} regressed from {previous} (baseline {baseline.get("commit")})')
+    return failures
+
+
+def main():
+    with open(PROFILES_PATH) as f:
+        profiles = json.load(f)
+
+    parser = argparse.ArgumentParser(description='SOC backend load benchmark')
+    parser.add_argument('--profile', choices=sorted(profiles), default='steady',
+                        help='Load settings and thresholds from thresholds.json; other options override them')
+    parser.add_argument('--url', help='Benchmark a running backend instead of the in-process app '
+                                      '(it must use the default database, which the detector writes to)')
+    parser.add_argument('--agents', type=int, default=8)
+    parser.add_argument('--readers', type=int, default=2)
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--batch-size', type=int, default=200)
+    parser.add_argument('--rate', type=float, default=0, help='Events/sec per agent (0 = as fast as possible)')
+    parser.add_argument('--burst-interval', type=float, default=2, help='Seconds between brute-force bursts (0 = none)')
+    parser.add_argument('--burst-size', type=int, default=8)
+    parser.add_argument('--detect-interval', type=float, default=1, help='Seconds between detection passes')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--baseline', help='Previous report to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed regression vs the baseline (fraction)')
+    parser.add_argument('--output', help='Report path (default: benchmarks/results/<time>-<commit>.json)')
+
+    profile_name = parser.parse_known_args()[0].profile
+    parser.set_defaults(**profiles[profile_name]['settings'])
+    args = parser.parse_args()
+
+    report = run(args)
+
+    thresholds = profiles[args.profile]['thresholds']
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('config', {}).get('profile') != args.profile:
+            print(f"[!] Baseline was run with profile {baseline.get('config', {}).get('profile')}, not {args.profile}")
+    failures = check(report, thresholds, baseline, args.tolerance)
+    report['thresholds'] = thresholds
+    report['failures'] = failures
+    report['passed'] = not failures
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        name = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{args.profile}-{report['commit'] or 'unknown'}.json"
+        output = os.path.join(RESULTS_DIR, name)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(json.dumps(report['metrics'], indent=2))
+    print(f"[*] Report written to {output}")
+    for failure in failures:
+        print(f"[!] {failure}")
+    print("[+] Within thresholds" if not failures else f"[!] {len(failures)} threshold(s) exceeded")
+    sys.exit(0 if not failures else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,9 +5,20 @@ from datetime import datetime, timedelta
 import plotly.express as px
 import plotly.graph_objects as go
 import json
+import threading
+import time
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
 
 # Configuration
 API_URL = "http://localhost:5000"
+# Seconds a fetched response is reused before it is revalidated with the API
+API_CACHE_TTL = 5
+API_CACHE_MAX_ENTRIES = 256
+ARROW_STREAM_TYPE = 'application/vnd.apache.arrow.stream'
 
 st.set_page_config(
     page_title="SOC Dashboard",
@@ -33,15 +44,70 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-def get_api_data(endpoint):
-    """Fetch data from API"""
+@st.cache_resource
+def get_api_cache():
+    """Response cache and HTTP session shared by all dashboard sessions"""
+    return {
+        'lock': threading.Lock(),
+        'entries': {},
+        'session': requests.Session()
+    }
+
+def fetch_cached(endpoint, parse, ttl=API_CACHE_TTL, accept=None):
+    """GET an endpoint through the shared cache, revalidating with ETags"""
+    cache = get_api_cache()
+    key = (endpoint, accept)
+    now = time.monotonic()
+    
+    with cache['lock']:
+        entry = cache['entries'].get(key)
+    if entry and now - entry['fetched'] < ttl:
+        return entry['data']
+    
+    headers = {}
+    if accept:
+        headers['Accept'] = accept
+    if entry and entry['etag']:
+        headers['If-None-Match'] = entry['etag']
+    
     try:
-        response = requests.get(f"{API_URL}{endpoint}", timeout=5)
+        response = cache['session'].get(f"{API_URL}{endpoint}", headers=headers, timeout=5)
+        if response.status_code == 304 and entry:
+            entry['fetched'] = now
+            return entry['data']
         if response.status_code == 200:
-            return response.json()
+            data = parse(response)
+            with cache['lock']:
+                entries = cache['entries']
+                entries.pop(key, None)
+                if len(entries) >= API_CACHE_MAX_ENTRIES:
+                    # Dicts keep insertion order, so the first key is the stalest
+                    entries.pop(next(iter(entries)))
+                entries[key] = {'data': data, 'etag': response.headers.get('ETag'), 'fetched': now}
+            return data
     except:
         return None
 
+def get_api_data(endpoint, ttl=API_CACHE_TTL):
+    """Fetch data from API"""
+    return fetch_cached(endpoint, lambda response: response.json(), ttl=ttl)
+
+def read_arrow_frame(response):
+    """Load an Arrow IPC stream into an Arrow-backed DataFrame without copying columns"""
+    table = pa.ipc.open_stream(response.content).read_all()
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+def get_api_frame(endpoint, key, ttl=API_CACHE_TTL):
+    """Fetch a list endpoint as a DataFrame, as Arrow when pyarrow is available"""
+    # pd.ArrowDtype (pandas 2) keeps the Arrow buffers instead of converting to objects
+    if pa is not None and hasattr(pd, 'ArrowDtype'):
+        return fetch_cached(endpoint, read_arrow_frame, ttl=ttl, accept=ARROW_STREAM_TYPE)
+    
+    data = get_api_data(endpoint, ttl=ttl)
+    if data is None:
+        return None
+    return pd.DataFrame(data.get(key, []))
+
 def get_alert_color(severity):
     """Get color based on severity"""
     colors = {
@@ -157,7 +223,7 @@ elif page == "Logs":
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        limit = st.slider("Logs to display", 10, 500, 100)
+        limit = st.select_slider("Logs to display", [10, 100, 500, 1000, 10000, 100000], 100)
     
     with col2:
         log_type_filter = st.selectbox(
@@ -172,22 +238,19 @@ elif page == "Logs":
         )
     
     # Get logs
-    logs_data = get_api_data(f'/api/logs/query?limit={limit}')
+    logs_df = get_api_frame(f'/api/logs/query?limit={limit}', 'logs')
     
-    if logs_data and logs_data.get('logs'):
-        logs_list = logs_data['logs']
-        
+    if logs_df is not None and not logs_df.empty:
         # Apply filters
         if log_type_filter != "All":
-            logs_list = [log for log in logs_list if log.get('log_type') == log_type_filter]
+            logs_df = logs_df[logs_df['log_type'] == log_type_filter]
         
         if severity_filter != "All":
-            logs_list = [log for log in logs_list if log.get('severity') == severity_filter]
+            logs_df = logs_df[logs_df['severity'] == severity_filter]
         
-        st.success(f"Total logs: {len(logs_list)}")
+        st.success(f"Total logs: {len(logs_df)}")
         
         # Display logs as table
-        logs_df = pd.DataFrame(logs_list)
         logs_df = logs_df[['timestamp', 'hostname', 'log_type', 'severity', 'message']]
         
         st.dataframe(logs_df, use_container_width=True, height=400)
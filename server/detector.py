@@ -16,6 +16,7 @@ class DetectionEngine:
     def __init__(self):
         self.rules = self.load_rules()
         self.event_cache = {}
+        self.session = requests.Session()
     
     def load_rules(self):
         with open(RULES_PATH, 'r') as f:
@@ -28,15 +29,61 @@ class DetectionEngine:
         except:
             return False
     
+    def get_field(self, log, key):
+        """Read a parsed field from its own column or the log's JSON fields"""
+        value = log.get(key)
+        if value is not None:
+            return value
+        
+        extra = log.get('fields')
+        if isinstance(extra, str):
+            # Parse once per log; every rule in this pass reuses it
+            extra = log['fields'] = json.loads(extra)
+        return (extra or {}).get(key)
+    
+    def match_fields(self, log, expected):
+        """Check parsed fields stored with the log against a rule's field filters.
+        
+        A filter value may be a single value, a list of allowed values, or
+        true to only require that the field is present.
+        """
+        if not expected:
+            return True
+        
+        for key, value in expected.items():
+            actual = self.get_field(log, key)
+            if value is True:
+                if actual in (None, ''):
+                    return False
+            elif isinstance(value, list):
+                if str(actual) not in [str(v) for v in value]:
+                    return False
+            elif str(actual) != str(value):
+                return False
+        return True
+    
+    def fetch_recent_logs(self, limit=500):
+        """Read the newest logs from the backend's in-memory window, or SQLite if it is down"""
+        try:
+            response = self.session.get(f'{BACKEND_API}/api/logs/query', params={'limit': limit}, timeout=10)
+            if response.status_code == 200:
+                return response.json()['logs']
+            print(f"[!] Backend returned {response.status_code}, reading logs from the database")
+        except Exception as e:
+            print(f"[!] Backend unavailable, reading logs from the database: {e}")
+        return Database.get_logs(limit=limit)
+    
     def analyze_logs(self):
         """Analyze recent logs against detection rules"""
-        recent_logs = Database.get_logs(limit=500)
+        recent_logs = self.fetch_recent_logs(limit=500)
         
         for rule in self.rules:
             if not rule['enabled']:
                 continue
             
-            matched_logs = []
+            # Matches per group_by value (a single group when the rule has none)
+            groups = {}
+            group_by = rule.get('group_by')
             current_time = datetime.now()
             time_window = timedelta(seconds=rule['time_window'])
             
@@ -50,14 +97,33 @@ class DetectionEngine:
                 if current_time - log_time > time_window:
                     continue
                 
-                # Check pattern match
-                if self.match_pattern(log['message'], rule['pattern']):
-                    if log['log_type'] == rule['log_type'] or rule['log_type'] == 'all':
-                        matched_logs.append(log['id'])
+                if log['log_type'] != rule['log_type'] and rule['log_type'] != 'all':
+                    continue
+                
+                # Cheap field filters first, regex on the message text last
+                if not self.match_fields(log, rule.get('fields')):
+                    continue
+                
+                # Rules without parsed fields to go on fall back to a regex over the message
+                if rule.get('pattern') and not self.match_pattern(log['message'], rule['pattern']):
+                    continue
+                
+                key = self.get_field(log, group_by) if group_by else None
+                if group_by and key in (None, ''):
+                    continue
+                
+                matched = groups.setdefault(key, [[], 0])
+                matched[0].append(log['id'])
+                # Agents collapse repeated lines into one row with a count
+                matched[1] += log.get('event_count') or 1
             
             # Check threshold
-            if len(matched_logs) >= rule['threshold']:
-                self.trigger_alert(rule, matched_logs)
+            for key, (matched_logs, event_count) in groups.items():
+                if event_count >= rule['threshold']:
+                    alert_rule = rule
+                    if group_by:
+                        alert_rule = dict(rule, description=f"{rule['description']} ({group_by}={key})")
+                    self.trigger_alert(alert_rule, matched_logs)
     
     def trigger_alert(self, rule, matched_log_ids):
         """Create alert for triggered rule"""
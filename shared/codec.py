@@ -0,0 +1,139 @@
+import gzip
+import json
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Content types understood on /api/logs/send
+JSON_TYPE = 'application/json'
+MSGPACK_TYPE = 'application/x-msgpack'
+
+_CHUNK_SIZE = 64 * 1024
+
+
+class PayloadError(Exception):
+    """Raised when an ingest payload cannot be decoded.
+
+    part names what the sender should change when it is the 'encoding' or
+    'format' that could not be read, rather than the batch itself.
+    """
+
+    def __init__(self, message, status=400, part=None):
+        super().__init__(message)
+        self.status = status
+        self.part = part
+
+
+def supported_encodings():
+    """Content-Encodings this process can read and write, best first"""
+    encodings = []
+    if zstandard is not None:
+        encodings.append('zstd')
+    encodings.extend(['gzip', 'identity'])
+    return encodings
+
+
+def supported_formats():
+    """Payload content types this process can read and write, best first"""
+    formats = []
+    if msgpack is not None:
+        # C-accelerated and schemaless: cheapest to decode, and keeps every log key
+        formats.append(MSGPACK_TYPE)
+    formats.append(JSON_TYPE)
+    return formats
+
+
+def compress(data, encoding):
+    """Compress a request body with the given Content-Encoding"""
+    if encoding == 'zstd':
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    if encoding == 'gzip':
+        return gzip.compress(data, compresslevel=6)
+    return data
+
+
+def decompress(data, encoding, max_size):
+    """Decompress a request body, refusing to inflate past max_size bytes"""
+    encoding = (encoding or 'identity').strip().lower()
+
+    if encoding == 'identity':
+        if len(data) > max_size:
+            raise PayloadError('Payload too large', 413)
+        return data
+
+    if encoding in ('gzip', 'x-gzip', 'deflate'):
+        wbits = zlib.MAX_WBITS | 16 if encoding != 'deflate' else zlib.MAX_WBITS
+        decompressor = zlib.decompressobj(wbits)
+        try:
+            out = decompressor.decompress(data, max_size + 1)
+        except zlib.error as e:
+            raise PayloadError(f'Invalid {encoding} body: {e}', part='encoding')
+        if len(out) > max_size or decompressor.unconsumed_tail:
+            raise PayloadError('Decompressed payload too large', 413)
+        return out
+
+    if encoding == 'zstd':
+        if zstandard is None:
+            raise PayloadError('zstd encoding not supported', 415, part='encoding')
+        out = bytearray()
+        try:
+            reader = zstandard.ZstdDecompressor().stream_reader(data)
+            while True:
+                chunk = reader.read(_CHUNK_SIZE)
+                if not chunk:
+                    break
+                out.extend(chunk)
+                if len(out) > max_size:
+                    raise PayloadError('Decompressed payload too large', 413)
+        except zstandard.ZstdError as e:
+            raise PayloadError(f'Invalid zstd body: {e}', part='encoding')
+        return bytes(out)
+
+    raise PayloadError(f'Unsupported Content-Encoding: {encoding}', 415, part='encoding')
+
+
+def encode_payload(payload, content_type):
+    """Serialize a {'hostname', 'logs'} payload in the given content type"""
+    if content_type == MSGPACK_TYPE:
+        return msgpack.packb(payload, use_bin_type=True)
+    return json.dumps(payload, separators=(',', ':')).encode('utf-8')
+
+
+def decode_payload(data, content_type):
+    """Parse a decompressed request body according to its content type"""
+    content_type = (content_type or JSON_TYPE).split(';')[0].strip().lower()
+
+    if content_type == MSGPACK_TYPE:
+        if msgpack is None:
+            raise PayloadError('msgpack payloads not supported', 415, part='format')
+        try:
+            payload = msgpack.unpackb(data, raw=False)
+        except Exception as e:
+            raise PayloadError(f'Invalid msgpack body: {e}', part='format')
+    elif content_type == JSON_TYPE:
+        try:
+            payload = json.loads(data)
+        except ValueError as e:
+            raise PayloadError(f'Invalid JSON body: {e}', part='format')
+    else:
+        raise PayloadError(f'Unsupported Content-Type: {content_type}', 415, part='format')
+
+    if not isinstance(payload, dict):
+        raise PayloadError('Payload must be an object')
+    return payload
+
+
+def negotiate(offered, supported):
+    """Pick the first of our supported options the peer also offers"""
+    for option in supported:
+        if option in offered:
+            return option
+    return None
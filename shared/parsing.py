@@ -0,0 +1,232 @@
+import re
+import threading
+import zlib
+from collections import OrderedDict
+
+# Syslog envelopes, most specific first
+_RFC5424 = re.compile(
+    r'^<(?P<pri>\d{1,3})>\d{1,2} (?P<timestamp>\S+) (?P<host>\S+) (?P<process>\S+) '
+    r'(?P<pid>\S+) (?P<msgid>\S+) (?:-|(?:\[.*?\])+) ?(?P<body>.*)$'
+)
+_RFC3164 = re.compile(
+    r'^(?:<(?P<pri>\d{1,3})>)?(?P<timestamp>[A-Z][a-z]{2} [ \d]\d \d{2}:\d{2}:\d{2}) '
+    r'(?P<host>\S+) (?P<process>[^\s\[:]+)(?:\[(?P<pid>\d+)\])?: ?(?P<body>.*)$'
+)
+_ISO_SYSLOG = re.compile(
+    r'^(?P<timestamp>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:?\d{2})?) '
+    r'(?P<host>\S+) (?P<process>[^\s\[:]+)(?:\[(?P<pid>\d+)\])?: ?(?P<body>.*)$'
+)
+_BARE_TAG = re.compile(r'^(?P<process>[A-Za-z][\w.\-/]*)(?:\[(?P<pid>\d+)\])?: ?(?P<body>.*)$')
+
+_IP = r'(?P<src_ip>\d{1,3}(?:\.\d{1,3}){3}|[0-9a-fA-F:]*:[0-9a-fA-F:]+)'
+
+_SSHD = [
+    (re.compile(r'^(?P<outcome>Failed|Accepted) (?P<method>\S+) for (?:(?P<invalid>invalid user) )?'
+                r'(?P<user>\S*) from ' + _IP + r' port (?P<src_port>\d+)'), None),
+    (re.compile(r'^Invalid user (?P<user>\S*) from ' + _IP + r'(?: port (?P<src_port>\d+))?'),
+     {'outcome': 'Invalid'}),
+    (re.compile(r'^(?:Connection closed|Disconnected from|Received disconnect from) '
+                r'(?:(?:invalid |authenticating )?user (?P<user>\S+) )?' + _IP + r'(?: port (?P<src_port>\d+))?'),
+     {'outcome': 'Disconnected'}),
+    (re.compile(r'authentication failure;.*?rhost=' + _IP + r'(?:\s+user=(?P<user>\S+))?'),
+     {'outcome': 'Failed'}),
+]
+# OpenSSH 9.8+ logs authentication from per-connection sshd-session/sshd-auth processes
+_SSHD_PROGRAMS = frozenset(('sshd', 'sshd-session', 'sshd-auth'))
+_SUDO = re.compile(
+    r'^\s*(?P<user>\S+) : (?:(?P<failure>.*?) ; )?TTY=(?P<tty>\S+) ; PWD=(?P<pwd>.*?) ; '
+    r'USER=(?P<target_user>\S+) ; (?:.*? ; )?COMMAND=(?P<command>.*)$'
+)
+_PAM_FAILURE = re.compile(r'^pam_unix\([^)]*\): (?P<failure>authentication failure);.*?(?:\buser=(?P<user>\S+))?\s*$')
+_KERNEL = [
+    re.compile(r'Kill(?:ed)? process (?:(?P<victim_pid>\d+) \((?P<victim_process>[^)]+)\)|'
+               r'(?P<victim_process2>\S+) \((?P<victim_pid2>\d+)\))'),
+    re.compile(r'\bSRC=' + _IP + r' DST=(?P<dst_ip>\S+).*?PROTO=(?P<proto>\S+)(?: SPT=(?P<src_port>\d+) DPT=(?P<dst_port>\d+))?'),
+]
+
+_IPV4 = re.compile(r'(?<![\d.])(?:\d{1,3}\.){3}\d{1,3}(?![\d.])')
+
+# Parsed fields that name an entity, by entity type
+ENTITY_FIELDS = {
+    'ip': ('src_ip', 'dst_ip'),
+    'user': ('user', 'target_user'),
+    'process': ('process', 'victim_process'),
+    'host': ('host',),
+}
+
+# Tokens containing digits are treated as variables by the template miner
+_VARIABLE_TOKEN = re.compile(r'\d')
+WILDCARD = '<*>'
+
+
+def _groups(match):
+    return {key: value for key, value in match.groupdict().items() if value}
+
+
+def parse_envelope(message):
+    """Split off the syslog header, returning its fields and the message body"""
+    for pattern in (_RFC5424, _RFC3164, _ISO_SYSLOG, _BARE_TAG):
+        match = pattern.match(message)
+        if match:
+            fields = _groups(match)
+            body = fields.pop('body', '')
+            if fields.get('pid') == '-':
+                del fields['pid']
+            fields.pop('msgid', None)
+            return fields, body
+    return {}, message
+
+
+def parse_body(process, body):
+    """Extract program-specific fields from a message body"""
+    program = (process or '').rsplit('/', 1)[-1]
+
+    if program in _SSHD_PROGRAMS:
+        for pattern, extra in _SSHD:
+            match = pattern.search(body)
+            if match:
+                fields = _groups(match)
+                if extra:
+                    fields.update(extra)
+                if fields.pop('invalid', None):
+                    fields['invalid_user'] = True
+                return fields
+
+    elif program == 'sudo':
+        match = _SUDO.match(body) or _PAM_FAILURE.match(body)
+        if match:
+            return _groups(match)
+
+    elif program == 'kernel':
+        for pattern in _KERNEL:
+            match = pattern.search(body)
+            if match:
+                fields = _groups(match)
+                for key in ('victim_pid', 'victim_process'):
+                    if f'{key}2' in fields:
+                        fields[key] = fields.pop(f'{key}2')
+                return fields
+
+    return {}
+
+
+def parse_message(message):
+    """Parse a raw log line into structured fields (stateless)"""
+    fields, body = parse_envelope(message)
+    fields.update(parse_body(fields.get('process'), body))
+    fields['body'] = body
+    return fields
+
+
+def template_group(tokens):
+    """Key of the miner group for a tokenized line or template"""
+    return ' '.join((str(len(tokens)), *tokens[:2]))
+
+
+def extract_entities(fields, message):
+    """Collect (entity_type, value) pairs from parsed fields and the raw line"""
+    entities = set()
+    for entity_type, keys in ENTITY_FIELDS.items():
+        for key in keys:
+            value = fields.get(key)
+            if value:
+                entities.add((entity_type, str(value)))
+
+    # Addresses in lines no parser understood are still worth indexing
+    for ip in _IPV4.findall(message):
+        entities.add(('ip', ip))
+    return entities
+
+
+class TemplateMiner:
+    """Online log template miner in the style of Drain.
+
+    Lines are tokenized and grouped by token count and the first two
+    tokens (the process and its first word); a line joins the most similar cluster in its group when enough tokens
+    match, with differing positions generalized to a wildcard. Clusters
+    are kept in an LRU so memory stays bounded on high-cardinality input.
+
+    An optional loader returns the stored (template_id, template) pairs of
+    a group. It is consulted the first time a group is seen and again after
+    any of its clusters is evicted, so a template keeps its id across
+    restarts and evictions instead of being mined afresh.
+    """
+
+    def __init__(self, similarity=0.5, max_clusters=5000, loader=None):
+        self.similarity = similarity
+        self.max_clusters = max_clusters
+        self.loader = loader
+        self.clusters = OrderedDict()
+        self.groups = {}
+        self.loaded = set()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def tokenize(body):
+        return [WILDCARD if _VARIABLE_TOKEN.search(token) else token for token in body.split()]
+
+    def load_group(self, group_key):
+        self.loaded.add(group_key)
+        members = self.groups.setdefault(group_key, [])
+        for cluster_id, template in self.loader(group_key):
+            if cluster_id not in self.clusters:
+                self.clusters[cluster_id] = template.split()
+                members.append(cluster_id)
+
+    def add(self, body):
+        """Assign a line to a template, returning (template_id, template)"""
+        tokens = self.tokenize(body)
+        group_key = template_group(tokens)
+
+        with self.lock:
+            if self.loader is not None and group_key not in self.loaded:
+                self.load_group(group_key)
+
+            best, best_score = None, -1.0
+            for cluster_id in self.groups.get(group_key, ()):
+                template = self.clusters[cluster_id]
+                same = sum(1 for a, b in zip(template, tokens) if a == b and a != WILDCARD)
+                constant = sum(1 for a in template if a != WILDCARD) or 1
+                score = same / constant
+                if score > best_score:
+                    best, best_score = cluster_id, score
+
+            if best is not None and best_score >= self.similarity:
+                template = self.clusters[best]
+                merged = [a if a == b else WILDCARD for a, b in zip(template, tokens)]
+                self.clusters[best] = merged
+                self.clusters.move_to_end(best)
+                return best, ' '.join(merged)
+
+            cluster_id = format(zlib.crc32(' '.join((str(len(tokens)), *tokens)).encode('utf-8')), '08x')
+            self.clusters[cluster_id] = tokens
+            self.clusters.move_to_end(cluster_id)
+            members = self.groups.setdefault(group_key, [])
+            if cluster_id not in members:
+                members.append(cluster_id)
+
+            while len(self.clusters) > self.max_clusters:
+                evicted, template = self.clusters.popitem(last=False)
+                evicted_key = template_group(template)
+                self.groups[evicted_key].remove(evicted)
+                if not self.groups[evicted_key]:
+                    del self.groups[evicted_key]
+                self.loaded.discard(evicted_key)
+
+            return cluster_id, ' '.join(tokens)
+
+
+class LogParser:
+    """Parses log lines once into structured fields plus a template id"""
+
+    def __init__(self, miner=None):
+        self.miner = miner or TemplateMiner()
+
+    def parse(self, message):
+        fields = parse_message(message)
+        body = fields.pop('body')
+        template_id, template = self.miner.add(f"{fields.get('process', '')} {body}")
+        fields['template_id'] = template_id
+        fields['template'] = template
+        fields['template_group'] = template_group(template.split())
+        return fields
@@ -1,5 +1,6 @@
 import json
 from datetime import datetime
+from parsing import parse_message
 
 def format_timestamp(ts):
     """Format timestamp for display"""
@@ -9,11 +10,11 @@ def format_timestamp(ts):
 
 def parse_log_message(message):
     """Parse log message into structured format"""
-    # Simple parser - can be extended
     parts = message.split('|')
     return {
         'raw': message,
-        'parts': parts
+        'parts': parts,
+        'fields': parse_message(message)
     }
 
 def severity_to_number(severity):